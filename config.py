@@ -4,9 +4,17 @@
 """
 import os
 import sys
-import json
+import copy
+import atexit
+import logging
+import threading
+import weakref
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Set
+
+from utils.json_utils import json_loads, json_dumps, JSONDecodeError
+
+logger = logging.getLogger(__name__)
 
 # 基础路径
 if getattr(sys, 'frozen', False):
@@ -34,6 +42,20 @@ else:
 # 确保目录存在
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 
+# Config.set 中表示键不存在
+_MISSING = object()
+
+# 所有Config实例（弱引用，不阻止实例被回收），退出时统一写出未保存的修改
+_instances = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_all() -> None:
+    """退出时写出所有实例尚未保存的配置"""
+    for cfg in list(_instances):
+        cfg.flush()
+
+
 class Config:
     """配置管理类"""
     
@@ -80,50 +102,76 @@ class Config:
         }
     }
     
+    # set()之后延迟保存的时间（秒），连续修改只写一次文件
+    SAVE_DELAY = 0.5
+    
     def __init__(self):
         self.config_path = DATA_DIR / 'config.json'
-        self.settings = {}
-        self._deep_copy(self.DEFAULTS, self.settings)
-        self.load()
+        self.settings = copy.deepcopy(self.DEFAULTS)
         
-    def _deep_copy(self, source: Dict, target: Dict) -> None:
-        """深度复制字典"""
-        for key, value in source.items():
-            if isinstance(value, dict):
-                target[key] = {}
-                self._deep_copy(value, target[key])
-            else:
-                target[key] = value
+        # 延迟保存状态
+        self._dirty = False
+        self._save_timer: Optional[threading.Timer] = None
+        self._save_lock = threading.Lock()
+        _instances.add(self)
+        
+        # 点分键 -> 值 的扁平索引，get()直接查表
+        self._flat: Dict[str, Any] = {}
+        
+        # get_path已创建过的目录
+        self._ensured_dirs: Set[Path] = set()
+        
+        self.load()
         
     def load(self) -> None:
         """加载配置文件"""
         if self.config_path.exists():
             try:
-                with open(self.config_path, 'r', encoding='utf-8') as f:
-                    loaded = json.load(f)
-                    self._deep_update(self.settings, loaded)
-            except (json.JSONDecodeError, IOError) as e:
+                loaded = json_loads(self.config_path.read_bytes())
+                self._deep_update(self.settings, loaded)
+            except (JSONDecodeError, IOError) as e:
                 print(f"配置文件加载失败: {e}")
                 
+        self._rebuild_flat()
+                
     def save(self) -> None:
-        """保存配置文件"""
-        try:
-            with open(self.config_path, 'w', encoding='utf-8') as f:
-                json.dump(self.settings, f, indent=2, ensure_ascii=False)
-        except IOError as e:
-            print(f"配置文件保存失败: {e}")
+        """立即保存配置文件"""
+        with self._save_lock:
+            if self._save_timer:
+                self._save_timer.cancel()
+                self._save_timer = None
+            self._dirty = False
+            
+            # 先完整写入临时文件再替换，避免崩溃时留下不完整的配置文件
+            tmp_path = self.config_path.with_suffix('.json.tmp')
+            try:
+                data = json_dumps(self.settings)
+                with open(tmp_path, 'wb', buffering=1 << 16) as f:
+                    f.write(data)
+                os.replace(tmp_path, self.config_path)
+            except (OSError, TypeError, ValueError):
+                # 可能在延迟保存的定时器线程中执行，异常无法传回调用方，只能记录
+                logger.exception("配置文件保存失败")
+                tmp_path.unlink(missing_ok=True)
+                
+    def flush(self) -> None:
+        """写入尚未保存的修改"""
+        if self._dirty:
+            self.save()
+            
+    def _schedule_save(self) -> None:
+        """标记为已修改，并在SAVE_DELAY秒后保存"""
+        with self._save_lock:
+            self._dirty = True
+            if self._save_timer:
+                self._save_timer.cancel()
+            self._save_timer = threading.Timer(self.SAVE_DELAY, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
             
     def get(self, key: str, default=None) -> Any:
         """获取配置值"""
-        keys = key.split('.')
-        value = self.settings
-        
-        for k in keys:
-            if isinstance(value, dict) and k in value:
-                value = value[k]
-            else:
-                return default
-        return value
+        return self._flat.get(key, default)
         
     def set(self, key: str, value: Any) -> None:
         """设置配置值"""
@@ -135,8 +183,28 @@ class Config:
                 target[k] = {}
             target = target[k]
             
+        # 值未变化时不写文件（同一个列表/字典对象可能被原地修改过，仍需保存）
+        old_value = target.get(keys[-1], _MISSING)
+        if old_value == value and not (old_value is value and isinstance(value, (list, dict))):
+            return
+            
         target[keys[-1]] = value
-        self.save()
+        self._rebuild_flat()
+        self._schedule_save()
+        
+    def _rebuild_flat(self) -> None:
+        """重建扁平索引"""
+        flat = {}
+        
+        def walk(prefix: str, node: Dict) -> None:
+            for k, v in node.items():
+                path = f'{prefix}.{k}' if prefix else k
+                flat[path] = v
+                if isinstance(v, dict):
+                    walk(path, v)
+                    
+        walk('', self.settings)
+        self._flat = flat
         
     def _deep_update(self, target: Dict, source: Dict) -> None:
         """深度更新字典"""
@@ -154,7 +222,10 @@ class Config:
         else:
             path = DATA_DIR / path_type
             
-        path.mkdir(parents=True, exist_ok=True)
+        # 每个目录只需创建一次
+        if path not in self._ensured_dirs:
+            path.mkdir(parents=True, exist_ok=True)
+            self._ensured_dirs.add(path)
         return path
 
 
@@ -1,24 +1,32 @@
 # mystia_rhythm/core/__init__.py
 """
 Core模块
+导出的名称在首次访问时才导入所在子模块
 """
+import importlib
 
-from .chart_parser import ChartParser, Chart, Note, NoteType, ChartMetadata
-from .game_engine import GameEngine, GameState
-from .audio_manager import AudioManager
-from .judgment_system import JudgmentSystem, Judgment
-from .timing import TimingSystem
+# 导出名称 -> 所在子模块
+_EXPORTS = {
+    'ChartParser': '.chart_parser',
+    'Chart': '.chart_parser',
+    'Note': '.chart_parser',
+    'NoteType': '.chart_parser',
+    'ChartMetadata': '.chart_parser',
+    'GameEngine': '.game_engine',
+    'GameState': '.game_engine',
+    'AudioManager': '.audio_manager',
+    'JudgmentSystem': '.judgment_system',
+    'Judgment': '.judgment_system',
+    'TimingSystem': '.timing',
+}
 
-__all__ = [
-    'ChartParser',
-    'Chart',
-    'Note', 
-    'NoteType',
-    'ChartMetadata',
-    'GameEngine',
-    'GameState',
-    'AudioManager',
-    'JudgmentSystem',
-    'Judgment',
-    'TimingSystem'
-]
\ No newline at end of file
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,16 @@
+# mystia_rhythm/core/_numba.py
+"""
+numba可选依赖
+numba不可用时njit退化为空装饰器，被装饰的函数以普通Python函数运行
+"""
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """numba不可用时的空装饰器"""
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
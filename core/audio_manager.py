@@ -7,6 +7,7 @@ import logging
 import threading
 import queue
 import time
+import weakref
 from typing import Optional, Dict, List, Tuple
 from pathlib import Path
 from enum import Enum
@@ -41,6 +42,9 @@ class AudioError(Exception):
 class AudioClip:
     """音频片段"""
     
+    # 已加载的音频片段（按绝对路径和后端共享，无引用时自动释放）
+    _cache = weakref.WeakValueDictionary()
+    
     def __init__(self, path: Path, backend: AudioBackend = AudioBackend.KIVY):
         self.path = path
         self.backend = backend
@@ -51,6 +55,20 @@ class AudioClip:
         self._position = 0.0  # 当前位置（秒）
         self._last_play_time = 0.0
         
+    @classmethod
+    def get_or_load(cls, path: Path, backend: AudioBackend = AudioBackend.KIVY) -> Optional['AudioClip']:
+        """获取已加载的同一文件，没有则加载，加载失败返回None"""
+        key = (str(Path(path).resolve()), backend)
+        clip = cls._cache.get(key)
+        if clip is not None and clip.loaded:
+            return clip
+            
+        clip = cls(path, backend)
+        if not clip.load():
+            return None
+        cls._cache[key] = clip
+        return clip
+        
     def load(self) -> bool:
         """加载音频"""
         try:
@@ -72,7 +90,7 @@ class AudioClip:
                 return True
                 
         except Exception as e:
-            logger.error(f"音频加载失败 {self.path}: {e}")
+            logger.error("音频加载失败 %s: %s", self.path, e)
             
         return False
         
@@ -103,7 +121,7 @@ class AudioClip:
             return True
             
         except Exception as e:
-            logger.error(f"音频播放失败: {e}")
+            logger.error("音频播放失败: %s", e)
             return False
             
     def stop(self) -> None:
@@ -164,9 +182,9 @@ class AudioManager:
         
         try:
             self.backend = self._detect_backend()
-            logger.info(f"音频后端: {self.backend.value}")
+            logger.info("音频后端: %s", self.backend.value)
         except Exception as e:
-            logger.error(f"音频后端检测失败: {e}")
+            logger.error("音频后端检测失败: %s", e)
             raise
             
         self.music: Optional[AudioClip] = None
@@ -181,7 +199,7 @@ class AudioManager:
         self.music_volume = config.get('audio.volume_music', 1.0)
         self.effect_volume = config.get('audio.volume_effect', 1.0)
         
-        logger.debug(f"音频参数 - 延迟: {self.latency}s, 主音量: {self.master_volume}")
+        logger.debug("音频参数 - 延迟: %ss, 主音量: %s", self.latency, self.master_volume)
         
     def _detect_backend(self) -> AudioBackend:
         """检测可用的音频后端"""
@@ -209,7 +227,10 @@ class AudioManager:
         """停止音频管理器"""
         self.running = False
         if self.worker_thread:
+            # 唤醒阻塞在队列上的工作线程
+            self.sound_queue.put(None)
             self.worker_thread.join(timeout=1.0)
+            self.worker_thread = None
             
         if self.music:
             self.music.stop()
@@ -219,17 +240,17 @@ class AudioManager:
             
     def load_music(self, path: Path) -> bool:
         """加载背景音乐"""
-        logger.info(f"加载音乐: {path}")
+        logger.info("加载音乐: %s", path)
         if self.music:
             self.music.stop()
             
-        self.music = AudioClip(path, self.backend)
-        success = self.music.load()
+        self.music = AudioClip.get_or_load(path, self.backend)
+        success = self.music is not None
         
         if success:
-            logger.debug(f"音乐加载成功 - 时长: {self.music.duration:.2f}s")
+            logger.debug("音乐加载成功 - 时长: %.2fs", self.music.duration)
         else:
-            logger.error(f"音乐加载失败: {path}")
+            logger.error("音乐加载失败: %s", path)
             
         return success
         
@@ -239,7 +260,7 @@ class AudioManager:
             logger.error("没有加载音乐")
             return False
             
-        logger.info(f"播放音乐 (start_time={start_time}s, loop={loop})")
+        logger.info("播放音乐 (start_time=%ss, loop=%s)", start_time, loop)
         success = self.music.play(start_time, self.master_volume * self.music_volume)
         
         if success:
@@ -275,8 +296,8 @@ class AudioManager:
             
     def load_sound(self, name: str, path: Path) -> bool:
         """加载音效"""
-        sound = AudioClip(path, self.backend)
-        if sound.load():
+        sound = AudioClip.get_or_load(path, self.backend)
+        if sound:
             self.sounds[name] = sound
             return True
         return False
@@ -325,19 +346,17 @@ class AudioManager:
     def _audio_worker(self) -> None:
         """音频工作线程"""
         while self.running:
-            try:
-                # 处理音效队列
-                while not self.sound_queue.empty():
-                    name, volume = self.sound_queue.get_nowait()
-                    if name in self.sounds:
-                        sound = self.sounds[name]
-                        sound.set_volume(self.master_volume * self.effect_volume * volume)
-                        sound.play()
-                        
-                time.sleep(0.01)  # 降低CPU使用
+            # 阻塞等待音效请求，空闲时不占用CPU
+            item = self.sound_queue.get()
+            if item is None:  # 停止信号
+                break
                 
-            except queue.Empty:
-                time.sleep(0.01)
+            try:
+                name, volume = item
+                if name in self.sounds:
+                    sound = self.sounds[name]
+                    sound.set_volume(self.master_volume * self.effect_volume * volume)
+                    sound.play()
+                    
             except Exception as e:
-                logger.error(f"音频工作线程错误: {e}")
-                time.sleep(0.1)
\ No newline at end of file
+                logger.error("音频工作线程错误: %s", e)
\ No newline at end of file
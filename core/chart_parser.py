@@ -4,16 +4,38 @@ Malody谱面解析器
 解析.mc和.mc.json格式的谱面文件
 """
 import logging
-import json
+import os
 import zipfile
 import re
+import hashlib
+import pickle
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, BinaryIO, Iterable, Iterator
 from dataclasses import dataclass, field
+from functools import cached_property
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
 
+import numpy as np
+
+from utils.json_utils import json_loads, json_dumps
+from config import CACHE_DIR
+from .timing import TimingSystem, beat_to_float, float_to_beat
+
 logger = logging.getLogger(__name__)
 
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+# 谱面缓存格式版本（Chart结构变化时递增，使旧缓存失效）
+_CACHE_VERSION = 5
+
+# 自动查找的音频文件扩展名（按优先级排列）
+_AUDIO_EXTENSIONS = ('.ogg', '.mp3', '.wav')
+
 class NoteType(Enum):
     """音符类型（根据Malody文档）"""
     TAP = 1      # 点击
@@ -21,27 +43,52 @@ class NoteType(Enum):
     DRAG = 3     # 拖拽
     FLICK = 4    # 滑键
     
-@dataclass
+
+# 谱面中type字段 -> 音符类型（未知或缺省按TAP处理）
+_NOTE_TYPE_MAP = {
+    2: NoteType.HOLD,
+    3: NoteType.DRAG,
+    4: NoteType.FLICK,
+}
+
+
+@dataclass(slots=True)
 class Note:
     """音符数据"""
-    beat: List[float]        # [整数拍, 分子, 分母]
+    beat: float              # 总拍数（解析时由 [整数拍, 分子, 分母] 换算）
     column: int              # 轨道（0-3）
-    endbeat: Optional[List[float]] = None  # 长按结束拍
+    endbeat: Optional[float] = None  # 长按结束拍
     type: NoteType = NoteType.TAP  # 音符类型
     sound: Optional[str] = None    # 音效文件
     volume: float = 1.0            # 音量
     
-@dataclass
+    # 运行时计算的时间（秒），不参与比较和保存
+    time: float = field(default=0.0, repr=False, compare=False)
+    duration: float = field(default=0.0, repr=False, compare=False)
+    
+    @property
+    def beat_raw(self) -> List[int]:
+        """Malody格式的开始拍 [整数拍, 分子, 分母]"""
+        return float_to_beat(self.beat)
+        
+    @property
+    def endbeat_raw(self) -> Optional[List[int]]:
+        """Malody格式的结束拍"""
+        if self.endbeat is None:
+            return None
+        return float_to_beat(self.endbeat)
+    
+@dataclass(slots=True)
 class TimeEvent:
     """时间事件（BPM变化等）"""
-    beat: List[float]
+    beat: float
     bpm: Optional[float] = None
     time_signature: Optional[Tuple[int, int]] = None
     
-@dataclass
+@dataclass(slots=True)
 class EffectEvent:
     """效果事件"""
-    beat: List[float]
+    beat: float
     type: str
     params: Dict[str, Any] = field(default_factory=dict)
     
@@ -70,10 +117,116 @@ class Chart:
     notes: List[Note]
     time_events: List[TimeEvent]
     effect_events: List[EffectEvent]
-    timing_system: Optional[Any] = None  # 时间系统实例
     
     # 自定义扩展数据（Mod使用）
     custom_data: Dict[str, Any] = field(default_factory=dict)
+    
+    # 音符的列式数组（beat/column/type/endbeat），供批量计算使用
+    note_arrays: Dict[str, np.ndarray] = field(default_factory=dict)
+    
+    def build_note_arrays(self) -> None:
+        """根据notes重新生成列式数组（音符增删改后需要调用）"""
+        beats = []
+        columns = []
+        types = []
+        endbeats = []
+        for note in self.notes:
+            beats.append(beat_to_float(note.beat))
+            columns.append(note.column)
+            types.append(note.type.value)
+            endbeats.append(np.nan if note.endbeat is None else beat_to_float(note.endbeat))
+            
+        self.note_arrays = {
+            'beat': np.asarray(beats, dtype=np.float64),
+            'column': np.asarray(columns, dtype=np.int8),
+            'type': np.asarray(types, dtype=np.int8),
+            'endbeat': np.asarray(endbeats, dtype=np.float64),
+        }
+        
+    def _get_note_array(self, key: str) -> np.ndarray:
+        """获取列式数组（尚未生成或与notes数量不一致时重新生成）"""
+        array = self.note_arrays.get(key)
+        if array is None or len(array) != len(self.notes):
+            self.build_note_arrays()
+            array = self.note_arrays[key]
+        return array
+        
+    @property
+    def note_beats(self) -> np.ndarray:
+        """音符拍数（float64）"""
+        return self._get_note_array('beat')
+        
+    @property
+    def note_columns(self) -> np.ndarray:
+        """音符轨道（int8）"""
+        return self._get_note_array('column')
+        
+    @property
+    def note_types(self) -> np.ndarray:
+        """音符类型（int8，NoteType的值）"""
+        return self._get_note_array('type')
+        
+    @property
+    def note_endbeats(self) -> np.ndarray:
+        """长按结束拍数（float64，非长按为NaN）"""
+        return self._get_note_array('endbeat')
+        
+    @cached_property
+    def timing_system(self) -> TimingSystem:
+        """时间系统（首次访问时根据初始BPM和BPM变化事件创建）"""
+        timing = TimingSystem(self.metadata.bpm)
+        for event in self.time_events:
+            if event.bpm:
+                timing.add_bpm_change(event.beat, event.bpm)
+        return timing
+
+
+def _note_to_dict(note: Note) -> Dict[str, Any]:
+    """将音符转换为Malody格式的字典（省略默认值字段）"""
+    note_dict = {
+        'beat': note.beat_raw,
+        'column': note.column,
+        'type': note.type.value
+    }
+    if note.endbeat is not None:
+        note_dict['endbeat'] = note.endbeat_raw
+    if note.sound:
+        note_dict['sound'] = note.sound
+    if note.volume != 1.0:
+        note_dict['vol'] = note.volume
+    return note_dict
+
+
+def _is_json_head(head: bytes) -> bool:
+    """根据开头的字节判断是否为JSON（首个非空白字符为 { 或 [）"""
+    return head.lstrip(b' \t\r\n')[:1] in (b'{', b'[')
+
+
+def _build_json_value(events: Iterator, event: str, value: Any) -> Any:
+    """从ijson事件流中构建一个完整的值（event/value为该值的第一个事件）"""
+    if event not in ('start_map', 'start_array'):
+        return value
+        
+    builder = ijson.ObjectBuilder()
+    builder.event(event, value)
+    depth = 1
+    for _, event, value in events:
+        builder.event(event, value)
+        if event in ('start_map', 'start_array'):
+            depth += 1
+        elif event in ('end_map', 'end_array'):
+            depth -= 1
+            if depth == 0:
+                break
+    return builder.value
+
+
+def _iter_json_array(events: Iterator) -> Iterator[Any]:
+    """在start_array之后逐个构建数组元素，数组结束时停止"""
+    for _, event, value in events:
+        if event == 'end_array':
+            return
+        yield _build_json_value(events, event, value)
 
 
 class ChartParser:
@@ -85,21 +238,35 @@ class ChartParser:
         从文件加载谱面
         支持 .mc, .mc.json, .mcz 格式
         """
-        logger.debug(f"尝试加载谱面: {file_path}")
+        logger.debug("尝试加载谱面: %s", file_path)
         
         if not file_path.exists():
-            logger.error(f"谱面文件不存在: {file_path}")
+            logger.error("谱面文件不存在: %s", file_path)
             return None
             
+        # 优先使用磁盘缓存
+        cache_key = ChartParser._cache_key(file_path)
+        chart = ChartParser._load_cached(file_path, cache_key)
+        if chart:
+            logger.debug("使用谱面缓存: %s", file_path)
+            return chart
+            
+        chart = ChartParser._load_uncached(file_path)
+        if chart:
+            ChartParser._save_cached(file_path, cache_key, chart)
+        return chart
+        
+    @staticmethod
+    def _load_uncached(file_path: Path) -> Optional[Chart]:
+        """根据文件类型解析谱面（不使用缓存）"""
         try:
             # 先尝试检测文件类型
             with open(file_path, 'rb') as f:
-                first_bytes = f.read(10)
-                f.seek(0)
+                first_bytes = f.read(16)
                 
                 # 检查是否是JSON格式（以 { 或 [ 开头）
-                if first_bytes.startswith(b'{') or first_bytes.startswith(b'['):
-                    logger.debug(f"检测到 JSON 格式: {file_path}")
+                if _is_json_head(first_bytes):
+                    logger.debug("检测到 JSON 格式: %s", file_path)
                     return ChartParser._load_json(file_path)
                 # 检查是否是.mcz压缩包
                 elif file_path.suffix == '.mcz':
@@ -111,48 +278,122 @@ class ChartParser:
                     return ChartParser._load_binary(file_path)
                     
         except Exception as e:
-            logger.error(f"谱面加载异常: {e}")
+            logger.error("谱面加载异常: %s", e)
             return None
             
+    @staticmethod
+    def _cache_path(file_path: Path) -> Path:
+        """获取谱面缓存文件路径"""
+        digest = hashlib.blake2b(str(file_path.resolve()).encode('utf-8'), digest_size=8).hexdigest()
+        return CACHE_DIR / f'chart_{digest}.pkl'
+        
+    @staticmethod
+    def _cache_key(file_path: Path) -> Tuple[int, int, int, int]:
+        """
+        缓存校验键：格式版本 + 文件修改时间/大小 + 目录修改时间
+        目录修改时间用于感知音频文件的增删
+        """
+        stat = file_path.stat()
+        dir_stat = file_path.parent.stat()
+        return (_CACHE_VERSION, stat.st_mtime_ns, stat.st_size, dir_stat.st_mtime_ns)
+        
+    @staticmethod
+    def _load_cached(file_path: Path, cache_key: Tuple) -> Optional[Chart]:
+        """读取谱面缓存，缓存失效时返回None"""
+        cache_path = ChartParser._cache_path(file_path)
+        if not cache_path.exists():
+            return None
+            
+        try:
+            with open(cache_path, 'rb') as f:
+                stored_key, chart = pickle.load(f)
+            if stored_key == cache_key:
+                return chart
+        except Exception as e:
+            logger.debug("谱面缓存读取失败: %s", e)
+        return None
+        
+    @staticmethod
+    def _save_cached(file_path: Path, cache_key: Tuple, chart: Chart) -> None:
+        """写入谱面缓存"""
+        try:
+            with open(ChartParser._cache_path(file_path), 'wb') as f:
+                pickle.dump((cache_key, chart), f, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            logger.debug("谱面缓存写入失败: %s", e)
+            
     @staticmethod
     def _load_mcz(mcz_path: Path) -> Optional[Chart]:
         """加载.mcz压缩包"""
         try:
             with zipfile.ZipFile(mcz_path, 'r') as zf:
                 # 查找谱面文件
-                chart_files = [f for f in zf.namelist() if f.endswith('.mc') or f.endswith('.mc.json')]
-                if not chart_files:
+                member = ChartParser._find_chart_member(zf)
+                if not member:
                     return None
                     
-                # 读取第一个谱面文件
-                chart_data = zf.read(chart_files[0])
-                
-                # 尝试解析JSON
-                try:
-                    chart_dict = json.loads(chart_data.decode('utf-8'))
-                    return ChartParser._parse_dict(chart_dict, mcz_path)
-                except:
+                # 流式读取第一个谱面文件，避免先整体解压到内存
+                with zf.open(member) as fh:
+                    # 根据开头字节判断格式，不必先按JSON解析失败再回退
+                    if _is_json_head(fh.peek(16)[:16]):
+                        if IJSON_AVAILABLE:
+                            chart_dict, parsed_notes = ChartParser._load_json_stream(fh)
+                            return ChartParser._parse_dict(chart_dict, mcz_path, parsed_notes)
+                        chart_dict = json_loads(fh.read())
+                        return ChartParser._parse_dict(chart_dict, mcz_path)
+                        
                     # 否则尝试二进制
-                    return ChartParser._parse_binary(chart_data)
+                    return ChartParser._parse_binary(fh.read())
                     
         except Exception as e:
-            logger.error(f"加载.mcz失败: {e}")
+            logger.error("加载.mcz失败: %s", e)
             return None
             
+    @staticmethod
+    def _load_json_stream(fh: BinaryIO) -> Tuple[Dict[str, Any], Tuple[List[Note], List[str]]]:
+        """
+        用ijson单次遍历读取JSON谱面
+        音符在读取过程中逐个转换为Note，不保留原始的音符字典列表
+        
+        Returns:
+            (除note外的顶层字段, _parse_notes的结果)
+        """
+        chart_dict: Dict[str, Any] = {}
+        parsed_notes: Tuple[List[Note], List[str]] = ([], [])
+        events = ijson.parse(fh, use_float=True)
+        for prefix, event, value in events:
+            # 只处理顶层的键，值由下面整体消费
+            if prefix or event != 'map_key':
+                continue
+            key = value
+            _, event, value = next(events)
+            if key == 'note' and event == 'start_array':
+                parsed_notes = ChartParser._parse_notes(_iter_json_array(events))
+            else:
+                chart_dict[key] = _build_json_value(events, event, value)
+        return chart_dict, parsed_notes
+        
+    @staticmethod
+    def _find_chart_member(zf: zipfile.ZipFile) -> Optional[str]:
+        """查找压缩包中的第一个谱面文件"""
+        for name in zf.namelist():
+            if name.endswith('.mc') or name.endswith('.mc.json'):
+                return name
+        return None
+        
     @staticmethod
     def _load_json(json_path: Path) -> Optional[Chart]:
         """加载JSON格式谱面"""
         try:
-            logger.debug(f"加载JSON谱面: {json_path}")
-            with open(json_path, 'r', encoding='utf-8') as f:
-                chart_dict = json.load(f)
+            logger.debug("加载JSON谱面: %s", json_path)
+            chart_dict = json_loads(json_path.read_bytes())
             chart = ChartParser._parse_dict(chart_dict, json_path)
             if chart:
-                logger.info(f"谱面加载成功: {chart.metadata.title} (Lv.{chart.metadata.level})")
-                logger.debug(f"音符数: {len(chart.notes)}, 时间事件: {len(chart.time_events)}")
+                logger.info("谱面加载成功: %s (Lv.%s)", chart.metadata.title, chart.metadata.level)
+                logger.debug("音符数: %d, 时间事件: %d", len(chart.notes), len(chart.time_events))
             return chart
         except Exception as e:
-            logger.error(f"JSON谱面加载失败: {e}")
+            logger.error("JSON谱面加载失败: %s", e)
             return None
             
     @staticmethod
@@ -163,7 +404,7 @@ class ChartParser:
                 data = f.read()
             return ChartParser._parse_binary(data)
         except Exception as e:
-            logger.error(f"加载二进制谱面失败: {e}")
+            logger.error("加载二进制谱面失败: %s", e)
             return None
             
     @staticmethod
@@ -175,10 +416,72 @@ class ChartParser:
         return None
         
     @staticmethod
-    def _parse_dict(chart_dict: Dict[str, Any], file_path: Path) -> Chart:
-        """解析字典格式的谱面数据"""
-        # 解析元数据
-        meta = chart_dict.get('meta', {})
+    def load_metadata(file_path: Path) -> Optional[ChartMetadata]:
+        """
+        只读取谱面元数据（用于选曲列表）
+        不解析音符和事件，bpm/duration/audio_path 保持默认值
+        """
+        try:
+            # 有有效缓存时直接使用
+            cached = ChartParser._load_cached(file_path, ChartParser._cache_key(file_path))
+            if cached:
+                return cached.metadata
+                
+            if file_path.suffix == '.mcz':
+                with zipfile.ZipFile(file_path, 'r') as zf:
+                    member = ChartParser._find_chart_member(zf)
+                    if not member:
+                        return None
+                    with zf.open(member) as fh:
+                        meta = ChartParser._read_meta(fh)
+            else:
+                with open(file_path, 'rb') as fh:
+                    meta = ChartParser._read_meta(fh)
+                    
+            if meta is None:
+                return None
+            return ChartParser._parse_metadata(meta)
+            
+        except Exception as e:
+            logger.error("读取谱面元数据失败 %s: %s", file_path, e)
+            return None
+            
+    @staticmethod
+    def load_directory(directory: Path,
+                       patterns: Tuple[str, ...] = ('*.mc', '*.mc.json')) -> List[Tuple[Path, ChartMetadata]]:
+        """
+        递归扫描目录，并行读取所有谱面的元数据
+        
+        Returns:
+            (谱面路径, 元数据) 列表，读取失败的谱面会被跳过
+        """
+        chart_files = [f for pattern in patterns for f in directory.rglob(pattern)]
+        if not chart_files:
+            return []
+            
+        # 读取以文件I/O为主，使用线程池重叠等待时间
+        max_workers = min(32, (os.cpu_count() or 1) * 4, len(chart_files))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            results = list(executor.map(ChartParser.load_metadata, chart_files))
+            
+        return [(path, meta) for path, meta in zip(chart_files, results) if meta is not None]
+        
+    @staticmethod
+    def _read_meta(fh: BinaryIO) -> Optional[Dict[str, Any]]:
+        """
+        从JSON谱面中读取meta对象
+        安装了ijson时读完meta即停止，不再读取后面的音符数据
+        """
+        if not _is_json_head(fh.peek(16)[:16]):
+            return None
+            
+        if IJSON_AVAILABLE:
+            return next(ijson.items(fh, 'meta', use_float=True), {})
+        return json_loads(fh.read()).get('meta', {})
+        
+    @staticmethod
+    def _parse_metadata(meta: Dict[str, Any]) -> ChartMetadata:
+        """解析meta对象"""
         song = meta.get('song', {})
         mode_ext = meta.get('mode_ext', {})
         
@@ -195,7 +498,7 @@ class ChartParser:
                 numbers = re.findall(r'\d+', difficulty)
                 level = int(numbers[-1]) if numbers else 0  # 使用最后一个数字
         
-        metadata = ChartMetadata(
+        return ChartMetadata(
             title=song.get('title', ''),
             artist=song.get('artist', ''),
             charter=meta.get('creator', ''),
@@ -209,30 +512,42 @@ class ChartParser:
             column=mode_ext.get('column', 4)  # 解析column
         )
         
+    @staticmethod
+    def _parse_dict(chart_dict: Dict[str, Any], file_path: Path,
+                    parsed_notes: Optional[Tuple[List[Note], List[str]]] = None) -> Chart:
+        """
+        解析字典格式的谱面数据
+        
+        Args:
+            chart_dict: 谱面字典
+            file_path: 谱面文件路径（用于查找音频）
+            parsed_notes: 已解析的音符（流式读取时note不在chart_dict中），为None时从chart_dict解析
+        """
+        # 解析元数据
+        metadata = ChartParser._parse_metadata(chart_dict.get('meta', {}))
+        
+        if parsed_notes is None:
+            parsed_notes = ChartParser._parse_notes(chart_dict.get('note', []))
+        notes, sounds = parsed_notes
+        
         # 查找音频文件（从谱面文件中提取或搜索目录）
         chart_dir = file_path.parent
         # 首先检查谱面note中是否有音频文件
-        note_data = chart_dict.get('note', [])
-        for note_obj in note_data:
-            if note_obj.get('sound'):
-                audio_file = chart_dir / note_obj['sound']
-                if audio_file.exists():
-                    metadata.audio_path = audio_file
-                    break
+        for sound in sounds:
+            audio_file = chart_dir / sound
+            if audio_file.exists():
+                metadata.audio_path = audio_file
+                break
         
         # 如果没有找到，搜索目录中的音频文件
         if not metadata.audio_path:
-            for ext in ['.ogg', '.mp3', '.wav']:
-                audio_files = list(chart_dir.glob(f'*{ext}'))
-                if audio_files:
-                    metadata.audio_path = audio_files[0]
-                    break
+            metadata.audio_path = ChartParser._find_audio_file(chart_dir)
         
         # 解析时间事件（BPM变化）
         time_events = []
         time_data = chart_dict.get('time', [])
         for time_event in time_data:
-            beat = time_event.get('beat', [0, 0, 1])
+            beat = beat_to_float(time_event.get('beat', (0, 0, 1)))
             bpm = time_event.get('bpm')
             if bpm:
                 time_events.append(TimeEvent(beat=beat, bpm=bpm))
@@ -243,49 +558,11 @@ class ChartParser:
         elif time_data and 'bpm' in time_data[0]:
             metadata.bpm = time_data[0]['bpm']
             
-        # 解析音符
-        notes = []
-        note_data = chart_dict.get('note', [])
-        for note_obj in note_data:
-            # 跳过音频对象（type=1）
-            if note_obj.get('type') == 1:
-                continue
-                
-            beat = note_obj.get('beat', [0, 0, 1])
-            column = note_obj.get('column', 0)
-            
-            # 处理长按
-            endbeat = note_obj.get('endbeat')
-            
-            # 确定音符类型
-            note_type = NoteType.TAP
-            type_val = note_obj.get('type')
-            if type_val == 2:
-                note_type = NoteType.HOLD
-            elif type_val == 3:
-                note_type = NoteType.DRAG
-            elif type_val == 4:
-                note_type = NoteType.FLICK
-                
-            # 音效
-            sound = note_obj.get('sound')
-            volume = note_obj.get('vol', 1.0)
-            
-            note = Note(
-                beat=beat,
-                column=column,
-                endbeat=endbeat,
-                type=note_type,
-                sound=sound,
-                volume=volume
-            )
-            notes.append(note)
-            
         # 解析效果事件
         effect_events = []
         effect_data = chart_dict.get('effect', [])
         for effect_obj in effect_data:
-            beat = effect_obj.get('beat', [0, 0, 1])
+            beat = beat_to_float(effect_obj.get('beat', (0, 0, 1)))
             effect_type = effect_obj.get('type', '')
             params = effect_obj.get('params', {})
             
@@ -295,47 +572,31 @@ class ChartParser:
                 params=params
             ))
             
-        # 创建时间系统
-        from .timing import TimingSystem
-        timing = TimingSystem(metadata.bpm)
-        for event in time_events:
-            # 计算总拍数
-            if len(event.beat) == 3:
-                whole, num, den = event.beat
-                beat_pos = whole + (num / den)
-            else:
-                beat_pos = float(event.beat[0])
-            if event.bpm:
-                timing.add_bpm_change(beat_pos, event.bpm)
-            
+        # 创建谱面对象（时间系统在首次访问时创建）
+        chart = Chart(
+            metadata=metadata,
+            notes=notes,
+            time_events=time_events,
+            effect_events=effect_events
+        )
+        
         # 计算谱面总时长（基于最后一个音符）
         if notes:
             # 找到最大的拍数
             max_beat = 0.0
             for note in notes:
-                # 计算音符开始的拍数
-                note_beat = note.beat[0] + note.beat[1] / note.beat[2]
-                if note.endbeat:
-                    end_beat = note.endbeat[0] + note.endbeat[1] / note.endbeat[2]
-                    note_beat = max(note_beat, end_beat)
+                note_beat = note.beat
+                if note.endbeat is not None:
+                    note_beat = max(note_beat, note.endbeat)
                 max_beat = max(max_beat, note_beat)
             
-            # 将最大拍数转换为时间
-            total_time = timing.beat_to_time([int(max_beat), 0, 1])
+            # 将最大拍数（取整）转换为时间
+            total_time = chart.timing_system.beat_to_time(int(max_beat))
             # 加上一个固定的偏移量，比如2秒，确保音符全部落下
             metadata.duration = total_time + 2.0
         else:
             metadata.duration = 0.0
             
-        # 创建谱面对象
-        chart = Chart(
-            metadata=metadata,
-            notes=notes,
-            time_events=time_events,
-            effect_events=effect_events,
-            timing_system=timing
-        )
-        
         # 解析自定义数据（扩展字段）
         custom_data = {}
         for key, value in chart_dict.items():
@@ -343,9 +604,81 @@ class ChartParser:
                 custom_data[key] = value
                 
         chart.custom_data = custom_data
+        chart.build_note_arrays()
         
         return chart
         
+    @staticmethod
+    def _parse_notes(note_data: Iterable[Dict[str, Any]]) -> Tuple[List[Note], List[str]]:
+        """
+        解析音符对象（只遍历一次，可以是流式读取的迭代器）
+        
+        Returns:
+            (音符列表, 按出现顺序引用的音效文件名，含type=1的音频对象)
+        """
+        # 循环内用到的方法先绑定到局部变量
+        notes = []
+        sounds = []
+        notes_append = notes.append
+        sounds_append = sounds.append
+        to_float = beat_to_float
+        type_map_get = _NOTE_TYPE_MAP.get
+        tap = NoteType.TAP
+        for note_obj in note_data:
+            get = note_obj.get
+            
+            sound = get('sound')
+            if sound:
+                sounds_append(sound)
+                
+            # 跳过音频对象（type=1）
+            type_val = get('type')
+            if type_val == 1:
+                continue
+                
+            # 处理长按
+            endbeat = get('endbeat')
+            if endbeat is not None:
+                endbeat = to_float(endbeat)
+                
+            # 拍数几乎总是 [整数拍, 分子, 分母]，直接解包，其他形式再走通用转换
+            beat = get('beat', (0, 0, 1))
+            try:
+                whole, num, den = beat
+                beat = whole + num / den
+            except (TypeError, ValueError):
+                beat = to_float(beat)
+                
+            notes_append(Note(
+                beat,                              # beat
+                get('column', 0),                  # column
+                endbeat,                           # endbeat
+                type_map_get(type_val, tap),       # type
+                sound,                             # 音效
+                get('vol', 1.0),                   # 音量
+            ))
+            
+        return notes, sounds
+        
+    @staticmethod
+    def _find_audio_file(chart_dir: Path) -> Optional[Path]:
+        """在谱面目录中查找音频文件（一次扫描，按 .ogg > .mp3 > .wav 优先）"""
+        found: Dict[str, str] = {}
+        try:
+            with os.scandir(chart_dir) as entries:
+                for entry in entries:
+                    ext = os.path.splitext(entry.name)[1]
+                    if ext in _AUDIO_EXTENSIONS and ext not in found and entry.is_file():
+                        found[ext] = entry.path
+        except OSError as e:
+            logger.debug("扫描音频文件失败 %s: %s", chart_dir, e)
+            return None
+            
+        for ext in _AUDIO_EXTENSIONS:
+            if ext in found:
+                return Path(found[ext])
+        return None
+        
     @staticmethod
     def save_to_file(chart: Chart, file_path: Path, format: str = 'json') -> bool:
         """
@@ -362,16 +695,14 @@ class ChartParser:
             else:
                 return ChartParser._save_binary(chart, file_path)
         except Exception as e:
-            logger.error(f"保存谱面失败: {e}")
+            logger.error("保存谱面失败: %s", e)
             return False
             
     @staticmethod
     def _save_json(chart: Chart, file_path: Path) -> bool:
         """保存为JSON格式"""
         chart_dict = ChartParser._chart_to_dict(chart)
-        
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(chart_dict, f, indent=2, ensure_ascii=False)
+        file_path.write_bytes(json_dumps(chart_dict))
         return True
         
     @staticmethod
@@ -413,46 +744,21 @@ class ChartParser:
         result['meta'] = meta
         
         # 时间事件
-        time_events = []
-        for event in chart.time_events:
-            time_event = {'beat': event.beat}
-            if event.bpm:
-                time_event['bpm'] = event.bpm
-            time_events.append(time_event)
-            
-        result['time'] = time_events
+        result['time'] = [
+            {'beat': float_to_beat(event.beat), 'bpm': event.bpm} if event.bpm
+            else {'beat': float_to_beat(event.beat)}
+            for event in chart.time_events
+        ]
         
         # 音符
-        notes = []
-        for note in chart.notes:
-            note_dict = {
-                'beat': note.beat,
-                'column': note.column,
-                'type': note.type.value
-            }
-            
-            if note.endbeat:
-                note_dict['endbeat'] = note.endbeat
-            if note.sound:
-                note_dict['sound'] = note.sound
-            if note.volume != 1.0:
-                note_dict['vol'] = note.volume
-                
-            notes.append(note_dict)
-            
-        result['note'] = notes
+        result['note'] = [_note_to_dict(note) for note in chart.notes]
         
         # 效果事件
         if chart.effect_events:
-            effects = []
-            for event in chart.effect_events:
-                effect_dict = {
-                    'beat': event.beat,
-                    'type': event.type,
-                    'params': event.params
-                }
-                effects.append(effect_dict)
-            result['effect'] = effects
+            result['effect'] = [
+                {'beat': float_to_beat(event.beat), 'type': event.type, 'params': event.params}
+                for event in chart.effect_events
+            ]
             
         # 自定义数据
         for key, value in chart.custom_data.items():
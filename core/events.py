@@ -0,0 +1,25 @@
+# mystia_rhythm/core/events.py
+"""
+游戏引擎回调事件名
+不依赖Kivy，供Mod API等无需加载窗口的模块导入
+"""
+
+# 游戏引擎支持的回调事件
+CALLBACK_EVENTS = (
+    'on_judgment',
+    'on_note_hit',
+    'on_note_miss',
+    'on_combo_change',
+    'on_score_change',
+    'on_game_start',
+    'on_game_end',
+    'on_state_change',
+)
+
+# 旧的逐项判定事件（已由 on_judgment(result, combo, score) 合并）
+LEGACY_JUDGMENT_EVENTS = frozenset((
+    'on_note_hit',
+    'on_note_miss',
+    'on_combo_change',
+    'on_score_change',
+))
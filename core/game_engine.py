@@ -3,23 +3,27 @@
 游戏引擎主循环 - 修复判定和按键处理
 """
 import logging
-from typing import Dict, List, Optional, Any, Callable
+from collections import deque
+from typing import TYPE_CHECKING, Dict, List, Optional, Callable, Tuple
 from enum import Enum
-import threading
 import time
-from pathlib import Path
 
-from kivy.app import App
-from kivy.clock import Clock
+import numpy as np
 from kivy.core.window import Window
-from kivy.uix.widget import Widget
 
-from .timing import GameClock, TimingSystem
+from .timing import GameClock
 from .audio_manager import AudioManager
-from .chart_parser import Chart, Note, NoteType
-from .judgment_system import JudgmentSystem, Judgment, JudgmentResult
+from .chart_parser import Chart, Note
+from .judgment_system import JudgmentSystem, JudgmentResult
+from .judgment_kernels import sweep_misses, find_hit
+from .events import CALLBACK_EVENTS, LEGACY_JUDGMENT_EVENTS
 from config import config
-from ui.play_ui import PlayUI
+
+if TYPE_CHECKING:
+    # 仅用于类型注解，避免导入时加载UI模块
+    from pathlib import Path
+    from kivy.app import App
+    from ui.play_ui import PlayUI
 
 
 # 配置日志
@@ -36,13 +40,38 @@ class GameState(Enum):
     EDITOR = 6
 
 
+# 键位映射（键码 -> 轨道）
+KEY_MAPS: Dict[str, Dict[int, int]] = {
+    # 标准键位：DFJK
+    'standard': {100: 0, 102: 1, 106: 2, 107: 3},
+    # WASD
+    'wasd': {97: 0, 119: 1, 115: 2, 100: 3},
+    # 方向键：左上下右
+    'arrows': {276: 0, 273: 1, 274: 2, 275: 3},
+}
+
+
 class GameEngine:
     """
     游戏引擎
     管理游戏主循环和状态
     """
     
-    def __init__(self, app: App):
+    # 固定属性集合，加快热路径上的属性访问
+    # __weakref__ 保留给Kivy的事件绑定（WeakMethod）
+    __slots__ = (
+        'app', 'state', 'clock', 'audio', 'current_chart', 'current_chart_path',
+        'judgment', 'scroll_speed', 'note_size', 'lanes',
+        'current_time', 'is_playing', 'keys_pressed',
+        'notes', 'note_times', 'note_columns', 'note_positions', 'note_revision',
+        'lane_notes', 'lane_times', '_miss_cursor',
+        '_game_end_time', 'end_delay', '_ui_dt_min', '_ui_last_t',
+        '_input_queue', '_last_update_wall',
+        'emit_legacy_events', 'key_layout', '_key_to_lane', 'play_ui',
+        'mod_manager', 'current_screen', '__weakref__',
+    ) + tuple('_cb_' + event for event in CALLBACK_EVENTS)
+    
+    def __init__(self, app: 'App'):
         logger.info("初始化游戏引擎")
         self.app = app
         self.state = GameState.LOADING
@@ -71,25 +100,41 @@ class GameEngine:
         
         # 音符数据
         self.notes: List[Note] = []
-        self.note_times: List[float] = []  # 每个音符的时间
+        self.note_times = np.empty(0, dtype=np.float64)  # 每个音符的时间（按时间升序）
+        self.note_columns = np.empty(0, dtype=np.int8)  # 每个音符的轨道（与note_times对应）
         self.note_positions: List[float] = []  # 每个音符的屏幕位置
+        self._miss_cursor = 0  # 自动MISS扫描指针，之前的音符都已越过判定窗口
+        self.note_revision = 0  # 音符列表的版本（载入谱面或Mod增删音符后递增，UI据此刷新音符索引）
+        self.lane_notes: List[np.ndarray] = []  # 每个轨道的音符索引（按时间升序）
+        self.lane_times: List[np.ndarray] = []  # 每个轨道的音符时间，与lane_notes一一对应
+        
+        # 游戏结束时间（音乐时长+1秒，时长未知时为无穷大；全部音符判定后提前）
+        self._game_end_time = float('inf')
+        self.end_delay = 2.0  # 全部音符判定后到结束的等待时间（秒）
+        
+        # UI刷新节流（按游戏时间）
+        self._ui_dt_min = 1.0 / 240.0  # UI最高刷新频率240Hz
+        self._ui_last_t = -1.0
+        
+        # 按下事件队列：按键回调只记录 (时间戳, 轨道)，在下一次update中统一判定（不限长度，卡顿时也不丢按键）
+        self._input_queue: deque = deque()
+        self._last_update_wall = time.perf_counter()  # 上一次update时的真实时间
+        
+        # 回调函数（每个事件存为 _cb_<事件名> 元组属性，热路径直接读取）
+        for event in CALLBACK_EVENTS:
+            setattr(self, '_cb_' + event, ())
+        # 是否继续触发旧的逐项判定事件（有订阅者注册时自动开启）
+        self.emit_legacy_events = False
         
-        # 回调函数
-        self.callbacks: Dict[str, List[Callable]] = {
-            'on_note_hit': [],
-            'on_note_miss': [],
-            'on_combo_change': [],
-            'on_score_change': [],
-            'on_game_start': [],
-            'on_game_end': [],
-            'on_state_change': []
-        }
+        # 键位布局和键码到轨道的映射（布局改变时通过set_key_layout重建）
+        self.key_layout = config.get('gameplay.key_layout', 'standard')
+        self._key_to_lane: Dict[int, int] = self._get_key_map(self.key_layout)
         
         # UI引用
-        self.play_ui: Optional[PlayUI] = None
+        self.play_ui: Optional['PlayUI'] = None
         
         # 当前谱面文件路径（用于查找背景等资源）
-        self.current_chart_path: Optional[Path] = None
+        self.current_chart_path: Optional['Path'] = None
         
         # 设置窗口事件
         Window.bind(on_key_down=self._on_key_down)
@@ -107,22 +152,26 @@ class GameEngine:
         
         self.current_chart = chart
         self.notes = chart.notes
-        
-        # 计算每个音符的时间
-        self.note_times = []
         self.note_positions = []
         
-        for note in self.notes:
-            note_time = chart.timing_system.beat_to_time(note.beat)
-            self.note_times.append(note_time)
+        # 直接使用谱面的列式数组，批量计算每个音符的时间（长按同时计算持续时间）
+        timing = chart.timing_system
+        note_times = timing.beat_to_time_batch(chart.note_beats)
+        durations = np.nan_to_num(timing.beat_to_time_batch(chart.note_endbeats) - note_times)
+        
+        # 按时间排序（稳定排序），MISS扫描指针依赖note_times单调递增
+        order = np.argsort(note_times, kind='stable')
+        self.notes[:] = [self.notes[i] for i in order.tolist()]
+        chart.note_arrays = {key: values[order] for key, values in chart.note_arrays.items()}
+        self.note_columns = chart.note_columns
+        self.note_times = note_times[order]
+        for note, note_time, duration in zip(self.notes, self.note_times.tolist(), durations[order].tolist()):
+            note.time = note_time
+            note.duration = duration
             
-            # 如果是长按，也计算结束时间
-            if note.endbeat:
-                end_time = chart.timing_system.beat_to_time(note.endbeat)
-                note.duration = end_time - note_time
-            else:
-                note.duration = 0.0
-                
+        self._build_lane_arrays()
+        self.note_revision += 1
+        
         # 重置游戏状态
         self.reset_game()
         
@@ -136,13 +185,41 @@ class GameEngine:
         logger.info(f"谱面加载完成")
         return True
         
+    def _build_lane_arrays(self) -> None:
+        """按轨道分组音符，按键时二分查找候选音符"""
+        columns = self.note_columns
+        lane_count = max(self.lanes, int(columns.max()) + 1 if len(columns) else 0)
+        self.lane_notes = [np.flatnonzero(columns == lane) for lane in range(lane_count)]
+        self.lane_times = [self.note_times[indices] for indices in self.lane_notes]
+        
+    def refresh_note_arrays(self) -> None:
+        """
+        谱面音符被修改后（Mod增删改音符）重新生成时间和轨道数组
+        音符需已按时间排序且time已计算；判定状态由调用方同步
+        """
+        notes = self.notes
+        self.note_times = np.fromiter((note.time for note in notes), dtype=np.float64, count=len(notes))
+        self.note_columns = self.current_chart.note_columns
+        self._build_lane_arrays()
+        self.note_revision += 1
+        
+        # 音符可能插入到已扫描过的位置，从头重新扫描（已判定的音符会被跳过）
+        self._miss_cursor = 0
+        
     def reset_game(self) -> None:
         """重置游戏状态"""
         logger.info("重置游戏状态")
         self.current_time = 0.0
         self.is_playing = False
         self.keys_pressed = [False] * self.lanes
-        self.judgment.reset()
+        self.judgment.reset(len(self.notes))
+        self._miss_cursor = 0
+        self._ui_last_t = -1.0
+        self._input_queue.clear()
+        
+        # 游戏结束时间
+        duration = self.current_chart.metadata.duration if self.current_chart else 0.0
+        self._game_end_time = duration + 1.0 if duration else float('inf')
         
         # 重置时钟
         self.clock.reset()
@@ -169,6 +246,7 @@ class GameEngine:
             self.audio.play_music()
             
         self.is_playing = True
+        self._last_update_wall = time.perf_counter()
         self._trigger_callbacks('on_game_start')
         self.change_state(GameState.PLAYING)
         logger.debug("游戏状态: 游玩中")
@@ -214,6 +292,7 @@ class GameEngine:
         # 然后恢复时钟和状态
         self.clock.resume()
         self.is_playing = True
+        self._last_update_wall = time.perf_counter()
         self.change_state(GameState.PLAYING)
         logger.debug("游戏状态: 游玩中")
         
@@ -251,52 +330,52 @@ class GameEngine:
             return
             
         # 更新当前时间
+        last_time = self.current_time
+        last_wall = self._last_update_wall
         self.current_time = self.clock.game_time
+        self._last_update_wall = time.perf_counter()
+        
+        # 先处理上一帧以来的输入（按输入发生时的时间判定）
+        if self._input_queue:
+            self._process_input_queue(last_time, last_wall)
         
         # 检查游戏是否应该结束（音乐播放完毕）
-        if self.current_chart and self.current_chart.metadata.duration:
-            if self.current_time >= self.current_chart.metadata.duration + 1.0:
-                logger.info("音乐播放完毕，游戏结束")
-                self.end_game()
-                
+        if self.current_time >= self._game_end_time:
+            logger.info("音乐播放完毕，游戏结束")
+            self.end_game()
+            
         # 更新音符位置和判定
         self._update_notes()
         
-        # 更新UI
-        if self.play_ui:
+        # 更新UI（时间变化不足一个刷新间隔时跳过，时间回退时立即刷新）
+        if self.play_ui and abs(self.current_time - self._ui_last_t) >= self._ui_dt_min:
+            self._ui_last_t = self.current_time
             self.play_ui.update(self.current_time)
             
     def _update_notes(self) -> None:
         """更新音符状态"""
-        if not self.current_chart:
+        if not self.current_chart or not self.judgment.remaining_notes:
             return
             
         # 获取当前时间和判定窗口
         current_time = self.current_time
-        judgment_window = 0.12  # 120ms转换为秒
-        
-        # 检查每个音符
-        for i, note in enumerate(self.notes):
-            note_time = self.note_times[i]
-            
-            # 检查时间是否有效
-            if note_time is None:
-                continue
+        judgment_window = self.judgment.window_miss_s
+        
+        # 音符按时间排序，指针只向前推进：每帧只处理新越过判定窗口的音符
+        self._miss_cursor, misses = sweep_misses(
+            self.note_times, self.judgment.judged_mask, self._miss_cursor, current_time, judgment_window
+        )
+        
+        # 音符已经经过判定窗口且未被判定，自动判定为MISS
+        note_times = self.note_times
+        note_columns = self.note_columns
+        for i in misses.tolist():
+            result = self.judgment.judge_note(self.notes[i], current_time, float(note_times[i]), True,
+                                              int(note_columns[i]))
+            if result:
+                self.judgment.mark_judged(i, result)
                 
-            # 如果音符已经经过判定窗口，自动判定为MISS
-            if current_time > note_time + judgment_window and i not in self.judgment.judged_notes:
-                # 自动MISS
-                result = self.judgment.judge_note(note, current_time, note_time, True)
-                if result:
-                    self.judgment.judged_notes[i] = result
-                    
-                    # 触发回调
-                    try:
-                        self._trigger_callbacks('on_note_miss', result)
-                        self._trigger_callbacks('on_combo_change', self.judgment.get_combo())
-                        self._trigger_callbacks('on_score_change', self.judgment.get_score())
-                    except Exception as e:
-                        logger.error(f"触发回调失败: {e}")
+                self._emit_judgment(result, False)
                         
     def handle_input(self, lane: int, pressed: bool) -> None:
         """
@@ -309,53 +388,79 @@ class GameEngine:
         if not self.is_playing or self.state != GameState.PLAYING or lane < 0 or lane >= self.lanes:
             return
             
+        # 按键状态立即更新；按下只记录时间，判定在下一次update中进行，不阻塞输入回调
         self.keys_pressed[lane] = pressed
-        
-        # 如果按下，检查是否有可判定的音符
         if pressed:
-            self._check_note_hit(lane)
+            self._input_queue.append((time.perf_counter(), lane))
+        
+    def _process_input_queue(self, last_time: float, last_wall: float) -> None:
+        """
+        处理排队的按下事件
+        
+        Args:
+            last_time: 上一次update时的游戏时间
+            last_wall: 上一次update时的真实时间（perf_counter）
+        """
+        queue = self._input_queue
+        time_scale = self.clock.time_scale
+        current_time = self.current_time
+        
+        while queue:
+            stamp, lane = queue.popleft()
             
-    def _check_note_hit(self, lane: int) -> None:
-        """检查指定轨道上的音符命中"""
-        if not self.current_chart:
+            # 按输入发生时的游戏时间检查是否有可判定的音符
+            event_time = last_time + (stamp - last_wall) * time_scale
+            self._check_note_hit(lane, min(max(event_time, last_time), current_time))
+                
+    def _check_note_hit(self, lane: int, current_time: Optional[float] = None) -> None:
+        """检查指定轨道上的音符命中（current_time为输入发生时的游戏时间）"""
+        if not self.current_chart or not self.judgment.remaining_notes:
             return
             
-        current_time = self.current_time
-        judgment_window = 0.12  # 120ms转换为秒
+        if current_time is None:
+            current_time = self.current_time
+        judgment_window = self.judgment.window_miss_s
         
-        # 查找在判定窗口内的音符
-        for i, note in enumerate(self.notes):
-            # 只检查指定轨道的音符
-            if note.column != lane:
-                continue
-                
-            # 跳过已判定的音符
-            if i in self.judgment.judged_notes:
-                continue
-                
-            note_time = self.note_times[i]
-            if note_time is None:
-                continue
-                
-            time_diff = abs(current_time - note_time)
+        if lane >= len(self.lane_times):
+            return
             
-            # 如果在判定窗口内
-            if time_diff <= judgment_window:
-                # 进行判定
-                result = self.judgment.judge_note(note, current_time, note_time, True)
-                if result:
-                    self.judgment.judged_notes[i] = result
-                    
-                    # 触发回调
-                    self._trigger_callbacks('on_note_hit', result)
-                    self._trigger_callbacks('on_combo_change', self.judgment.get_combo())
-                    self._trigger_callbacks('on_score_change', self.judgment.get_score())
-                    
-                    # 播放判定音效
-                    if note.sound:
-                        self.audio.play_sound(note.sound, note.volume)
-                    break
+        # 二分查找该轨道判定窗口内最早的未判定音符
+        i = int(find_hit(self.lane_times[lane], self.lane_notes[lane], self.judgment.judged_mask,
+                         current_time, judgment_window))
+        if i < 0:
+            return
+            
+        note = self.notes[i]
+        result = self.judgment.judge_note(note, current_time, float(self.note_times[i]), True, lane)
+        if result:
+            self.judgment.mark_judged(i, result)
+            
+            self._emit_judgment(result, True)
+            
+            # 播放判定音效
+            if note.sound:
+                self.audio.play_sound(note.sound, note.volume)
                     
+    def _emit_judgment(self, result: JudgmentResult, hit: bool) -> None:
+        """触发判定回调（没有订阅者时跳过）"""
+        # 最后一个音符判定后，等待end_delay秒结束游戏
+        if not self.judgment.remaining_notes:
+            self._game_end_time = min(self._game_end_time, self.current_time + self.end_delay)
+            
+        if self._cb_on_judgment:
+            self._run_callbacks('on_judgment', self._cb_on_judgment,
+                                result, self.judgment.get_combo(), self.judgment.get_score())
+            
+        if not self.emit_legacy_events:
+            return
+            
+        if hit:
+            self._trigger_callbacks('on_note_hit', result)
+        else:
+            self._trigger_callbacks('on_note_miss', result)
+        self._trigger_callbacks('on_combo_change', self.judgment.get_combo())
+        self._trigger_callbacks('on_score_change', self.judgment.get_score())
+        
     def change_state(self, new_state: GameState) -> None:
         """改变游戏状态"""
         old_state = self.state
@@ -366,35 +471,43 @@ class GameEngine:
         
     def register_callback(self, event: str, callback: Callable) -> None:
         """注册回调函数"""
-        if event in self.callbacks:
-            self.callbacks[event].append(callback)
+        if event in CALLBACK_EVENTS:
+            name = '_cb_' + event
+            setattr(self, name, getattr(self, name) + (callback,))
+            if event in LEGACY_JUDGMENT_EVENTS:
+                self.emit_legacy_events = True
             
     def unregister_callback(self, event: str, callback: Callable) -> None:
         """取消注册回调函数"""
-        if event in self.callbacks:
-            if callback in self.callbacks[event]:
-                self.callbacks[event].remove(callback)
+        if event in CALLBACK_EVENTS:
+            name = '_cb_' + event
+            callbacks = list(getattr(self, name))
+            if callback in callbacks:
+                callbacks.remove(callback)
+                setattr(self, name, tuple(callbacks))
                 
     def _trigger_callbacks(self, event: str, *args, **kwargs) -> None:
         """触发回调函数"""
-        if event in self.callbacks:
-            for callback in self.callbacks[event]:
-                try:
-                    callback(*args, **kwargs)
-                except Exception as e:
-                    logger.error(f"回调函数执行失败 {event}: {e}")
+        callbacks = getattr(self, '_cb_' + event, ())
+        if callbacks:
+            self._run_callbacks(event, callbacks, *args, **kwargs)
+            
+    @staticmethod
+    def _run_callbacks(event: str, callbacks: Tuple[Callable, ...], *args, **kwargs) -> None:
+        """依次执行回调元组中的函数"""
+        for callback in callbacks:
+            try:
+                callback(*args, **kwargs)
+            except Exception as e:
+                logger.error(f"回调函数执行失败 {event}: {e}")
                     
     def _on_key_down(self, window, key, scancode, codepoint, modifiers) -> bool:
         """处理键盘按下事件"""
-        # 获取键位映射
-        key_layout = config.get('gameplay.key_layout', 'standard')
-        key_map = self._get_key_map(key_layout)
-        
         # 检查是否按下对应轨道的键
-        for lane, keys in key_map.items():
-            if key in keys:
-                self.handle_input(lane, True)
-                return True
+        lane = self._key_to_lane.get(key)
+        if lane is not None:
+            self.handle_input(lane, True)
+            return True
                 
         # 其他功能键
         if key == 27:  # ESC
@@ -415,46 +528,18 @@ class GameEngine:
         
     def _on_key_up(self, window, key, scancode) -> bool:
         """处理键盘释放事件"""
-        key_layout = config.get('gameplay.key_layout', 'standard')
-        key_map = self._get_key_map(key_layout)
-        
-        for lane, keys in key_map.items():
-            if key in keys:
-                self.handle_input(lane, False)
-                return True
-                
+        lane = self._key_to_lane.get(key)
+        if lane is not None:
+            self.handle_input(lane, False)
+            return True
+            
         return False
         
-    def _get_key_map(self, layout: str) -> Dict[int, List[int]]:
-        """获取键位映射"""
-        # 标准键位：DFJK
-        if layout == 'standard':
-            return {
-                0: [100],  # D
-                1: [102],  # F
-                2: [106],  # J
-                3: [107],  # K
-            }
-        # WASD
-        elif layout == 'wasd':
-            return {
-                0: [97],   # A
-                1: [119],  # W
-                2: [115],  # S
-                3: [100],  # D
-            }
-        # 方向键
-        elif layout == 'arrows':
-            return {
-                0: [276],  # 左
-                1: [273],  # 上
-                2: [274],  # 下
-                3: [275],  # 右
-            }
-        # 默认返回标准键位
-        return {
-            0: [100],
-            1: [102],
-            2: [106],
-            3: [107],
-        }
\ No newline at end of file
+    def set_key_layout(self, layout: str) -> None:
+        """切换键位布局"""
+        self.key_layout = layout
+        self._key_to_lane = self._get_key_map(layout)
+        
+    def _get_key_map(self, layout: str) -> Dict[int, int]:
+        """获取键位映射（键码 -> 轨道），未知布局使用标准键位"""
+        return KEY_MAPS.get(layout, KEY_MAPS['standard'])
@@ -0,0 +1,68 @@
+# mystia_rhythm/core/judgment_kernels.py
+"""
+判定内核 - 判定热路径上的纯数值循环
+numba可用时JIT编译，不可用时以普通Python函数运行
+"""
+import numpy as np
+
+from ._numba import njit, NUMBA_AVAILABLE
+
+
+@njit(cache=True)
+def sweep_misses(note_times, judged_mask, cursor, cur_t, window):
+    """
+    推进MISS扫描指针
+
+    Args:
+        note_times: 按时间升序排列的音符时间
+        judged_mask: 音符是否已判定
+        cursor: 当前扫描指针
+        cur_t: 当前游戏时间（秒）
+        window: 判定窗口（秒）
+
+    Returns:
+        (新的扫描指针, 新越过判定窗口且未判定的音符索引)
+    """
+    count = note_times.shape[0]
+    end = cursor
+    while end < count and cur_t > note_times[end] + window:
+        end += 1
+
+    misses = np.empty(end - cursor, dtype=np.int64)
+    miss_count = 0
+    for i in range(cursor, end):
+        if not judged_mask[i]:
+            misses[miss_count] = i
+            miss_count += 1
+    return end, misses[:miss_count]
+
+
+@njit(cache=True)
+def find_hit(lane_times, lane_indices, judged_mask, cur_t, window):
+    """
+    在单个轨道中查找判定窗口内最早的未判定音符
+
+    Args:
+        lane_times: 该轨道音符时间（升序）
+        lane_indices: 该轨道音符在谱面中的索引
+        judged_mask: 音符是否已判定
+        cur_t: 当前游戏时间（秒）
+        window: 判定窗口（秒）
+
+    Returns:
+        音符索引，没有可判定的音符时返回-1
+    """
+    start = np.searchsorted(lane_times, cur_t - window)
+    for j in range(start, lane_times.shape[0]):
+        if lane_times[j] > cur_t + window:
+            break
+        i = lane_indices[j]
+        if not judged_mask[i]:
+            return i
+    return -1
+
+
+if NUMBA_AVAILABLE:
+    # 导入时预热JIT，避免编译耗时落在游戏中的第一帧和第一次按键
+    sweep_misses(np.zeros(1), np.zeros(1, dtype=np.bool_), 0, 0.0, 0.1)
+    find_hit(np.zeros(1), np.zeros(1, dtype=np.int64), np.zeros(1, dtype=np.bool_), 0.0, 0.1)
@@ -3,10 +3,12 @@
 判定系统 - 修复KeyError
 """
 import logging
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 from dataclasses import dataclass
 from enum import Enum
 
+import numpy as np
+
 logger = logging.getLogger(__name__)
 
 
@@ -18,7 +20,16 @@ class Judgment(Enum):
     MISS = "MISS"
 
 
-@dataclass
+# 各判定的基础分（字典，键为Judgment.value，与judgment_counts相同）
+JUDGMENT_SCORES: Dict[str, int] = {
+    "BEST": 1000,
+    "COOL": 800,
+    "GOOD": 500,
+    "MISS": 0
+}
+
+
+@dataclass(slots=True)
 class JudgmentResult:
     """判定结果"""
     judgment: Judgment
@@ -31,6 +42,8 @@ class JudgmentResult:
 class ScoreCalculator:
     """分数计算器"""
     
+    __slots__ = ('total_notes', 'max_combo', 'current_combo', 'total_score', 'judgment_counts')
+    
     def __init__(self):
         self.total_notes = 0
         self.max_combo = 0
@@ -43,38 +56,29 @@ class ScoreCalculator:
             "MISS": 0
         }
         
-    def add_judgment(self, judgment: Judgment) -> JudgmentResult:
-        """添加判定"""
+    def add_judgment(self, judgment: Judgment, offset: float = 0.0,
+                     lane: Optional[int] = None) -> JudgmentResult:
+        """添加判定（offset为偏移毫秒数）"""
         self.total_notes += 1
         
+        value = judgment.value
+        
         # 更新连击
-        if judgment == Judgment.MISS:
+        if judgment is Judgment.MISS:
             self.current_combo = 0
         else:
             self.current_combo += 1
-            self.max_combo = max(self.max_combo, self.current_combo)
-            
-        # 计算分数
-        if judgment == Judgment.BEST:
-            score = 1000
-        elif judgment == Judgment.COOL:
-            score = 800
-        elif judgment == Judgment.GOOD:
-            score = 500
-        else:  # MISS
-            score = 0
-            
+            if self.current_combo > self.max_combo:
+                self.max_combo = self.current_combo
+                
+        # 计算分数（查表）
+        score = JUDGMENT_SCORES[value]
         self.total_score += score
         
         # 更新判定计数
-        self.judgment_counts[judgment.value] += 1
+        self.judgment_counts[value] += 1
         
-        return JudgmentResult(
-            judgment=judgment,
-            offset=0.0,
-            score=score,
-            combo=self.current_combo
-        )
+        return JudgmentResult(judgment, offset, score, self.current_combo, lane)
         
     def get_accuracy(self) -> float:
         """计算准确率"""
@@ -113,6 +117,11 @@ class ScoreCalculator:
 class JudgmentSystem:
     """判定系统"""
     
+    __slots__ = (
+        'calculator', 'windows', 'window_best_s', 'window_cool_s', 'window_good_s', 'window_miss_s',
+        'judged_mask', 'judgment_results', 'remaining_notes',
+    )
+    
     def __init__(self):
         self.calculator = ScoreCalculator()
         self.windows = {
@@ -121,29 +130,59 @@ class JudgmentSystem:
             "GOOD": 80,   # ±80ms
             "MISS": 120   # ±120ms
         }
-        self.judged_notes = {}
-        
-    def judge_note(self, note, current_time: float, note_time: float, pressed: bool = True) -> Optional[JudgmentResult]:
+        self._update_window_seconds()
+        # 音符是否已判定（按音符索引），以及对应的判定结果
+        self.judged_mask = np.zeros(0, dtype=np.bool_)
+        self.judgment_results: List[Optional[JudgmentResult]] = []
+        self.remaining_notes = 0  # 尚未判定的音符数
+        
+    def _update_window_seconds(self) -> None:
+        """预先把判定窗口换算为秒，避免判定时重复换算"""
+        self.window_best_s = self.windows["BEST"] * 1e-3
+        self.window_cool_s = self.windows["COOL"] * 1e-3
+        self.window_good_s = self.windows["GOOD"] * 1e-3
+        self.window_miss_s = self.windows["MISS"] * 1e-3
+        
+    def judge_note(self, note, current_time: float, note_time: float, pressed: bool = True,
+                   lane: Optional[int] = None) -> Optional[JudgmentResult]:
         """判定音符"""
         if not pressed:
             return None
             
-        # 计算时间差（毫秒）
-        time_diff = abs(current_time - note_time) * 1000
+        # 计算时间差（秒）
+        time_diff = abs(current_time - note_time)
         
         # 确定判定等级
         judgment = Judgment.MISS
-        if time_diff <= self.windows["BEST"]:
+        if time_diff <= self.window_best_s:
             judgment = Judgment.BEST
-        elif time_diff <= self.windows["COOL"]:
+        elif time_diff <= self.window_cool_s:
             judgment = Judgment.COOL
-        elif time_diff <= self.windows["GOOD"]:
+        elif time_diff <= self.window_good_s:
             judgment = Judgment.GOOD
             
-        # 创建判定结果
-        result = self.calculator.add_judgment(judgment)
-        result.offset = time_diff
-        
+        # 创建判定结果（偏移以毫秒记录）
+        return self.calculator.add_judgment(judgment, time_diff * 1000, lane)
+        
+    def mark_judged(self, index: int, result: JudgmentResult) -> None:
+        """记录音符的判定结果"""
+        self.judged_mask[index] = True
+        self.judgment_results[index] = result
+        self.remaining_notes -= 1
+        
+    def insert_note(self, index: int, result: Optional[JudgmentResult] = None) -> None:
+        """在index处插入一个音符的判定状态（谱面插入音符后调用）"""
+        self.judged_mask = np.insert(self.judged_mask, index, result is not None)
+        self.judgment_results.insert(index, result)
+        if result is None:
+            self.remaining_notes += 1
+            
+    def remove_note(self, index: int) -> Optional[JudgmentResult]:
+        """移除index处音符的判定状态（谱面移除音符后调用），返回其判定结果"""
+        result = self.judgment_results.pop(index)
+        self.judged_mask = np.delete(self.judged_mask, index)
+        if result is None:
+            self.remaining_notes -= 1
         return result
         
     def get_accuracy(self) -> float:
@@ -158,7 +197,9 @@ class JudgmentSystem:
         """获取连击"""
         return self.calculator.get_combo()
         
-    def reset(self) -> None:
-        """重置判定系统"""
+    def reset(self, note_count: int = 0) -> None:
+        """重置判定系统（note_count为谱面音符数）"""
         self.calculator.reset()
-        self.judged_notes.clear()
\ No newline at end of file
+        self.judged_mask = np.zeros(note_count, dtype=np.bool_)
+        self.judgment_results = [None] * note_count
+        self.remaining_notes = note_count
\ No newline at end of file
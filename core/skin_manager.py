@@ -2,41 +2,56 @@
 皮肤管理系统
 支持自定义UI和游戏元素外观
 """
-import json
+import os
+import sys
 from pathlib import Path
-from typing import Dict, Any, Optional
+from types import MappingProxyType
+from typing import Dict, Any, Optional, Mapping
 from dataclasses import dataclass
 
+import numpy as np
+
 from config import config, SKINS_DIR
+from utils.json_utils import json_loads, json_dumps
+
+# 音符颜色键（预先驻留，渲染时直接使用这些字符串查询颜色）
+NOTE_KEYS = {t: sys.intern(f'note_{t}') for t in ('tap', 'hold', 'drag', 'flick')}
 
 
-@dataclass
+@dataclass(frozen=True, slots=True, eq=False)
 class SkinConfig:
-    """皮肤配置"""
+    """皮肤配置（加载后只读，需要修改时用 dataclasses.replace 生成新对象）"""
     name: str
     author: str
     version: str
     description: str
     
-    # 颜色配置
-    note_colors: Dict[str, list]  # 音符类型 -> RGB颜色
-    judgment_line_color: list
-    background_color: list
-    ui_primary_color: list
-    ui_secondary_color: list
+    # 颜色配置（加载时转换为float32数组，可直接上传给GL）
+    note_colors: Mapping[str, np.ndarray]  # 音符类型 -> RGB颜色
+    judgment_line_color: np.ndarray
+    background_color: np.ndarray
+    ui_primary_color: np.ndarray
+    ui_secondary_color: np.ndarray
     
     # 字体配置
     font_name: str
-    font_sizes: Dict[str, int]
+    font_sizes: Mapping[str, int]
     
     # 图片路径
-    images: Dict[str, str]
+    images: Mapping[str, str]
     
     # 特效配置
     particle_effects: bool
     animation_speed: float
 
 
+def _as_color(value) -> np.ndarray:
+    """将配置中的颜色列表转换为只读的float32数组"""
+    color = np.array(value, dtype=np.float32)
+    color.flags.writeable = False
+    return color
+
+
 class SkinManager:
     """皮肤管理器"""
     
@@ -44,6 +59,9 @@ class SkinManager:
         self.skins_dir = SKINS_DIR
         self.current_skin: Optional[SkinConfig] = None
         self.available_skins: Dict[str, Path] = {}
+        self._color_map: Dict[str, np.ndarray] = {}  # 固定颜色键 -> 颜色（加载皮肤时生成）
+        self._skin_path: Optional[Path] = None  # 当前皮肤目录
+        self._image_cache: Dict[str, Optional[Path]] = {}  # 图片键 -> 图片路径（不存在为None）
         
         self._scan_skins()
         self._load_current_skin()
@@ -52,19 +70,21 @@ class SkinManager:
         """扫描皮肤目录"""
         if not self.skins_dir.exists():
             self.skins_dir.mkdir(parents=True, exist_ok=True)
-            self._create_default_skin()
+        self._create_default_skin()
             
-        for skin_dir in self.skins_dir.iterdir():
-            if not skin_dir.is_dir():
-                continue
-                
-            config_file = skin_dir / 'config.json'
-            if config_file.exists():
-                self.available_skins[skin_dir.name] = skin_dir
+        # 目录项类型随scandir一次读出，config.json是否存在留到load_skin读取时再检查
+        with os.scandir(self.skins_dir) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    self.available_skins[entry.name] = Path(entry.path)
                 
     def _create_default_skin(self) -> None:
-        """创建默认皮肤"""
+        """创建默认皮肤（已存在时跳过）"""
         default_dir = self.skins_dir / 'default'
+        config_file = default_dir / 'config.json'
+        if config_file.exists():
+            return
+            
         default_dir.mkdir(exist_ok=True)
         
         default_config = {
@@ -103,9 +123,7 @@ class SkinManager:
             'animation_speed': 1.0
         }
         
-        config_file = default_dir / 'config.json'
-        with open(config_file, 'w', encoding='utf-8') as f:
-            json.dump(default_config, f, indent=2, ensure_ascii=False)
+        config_file.write_bytes(json_dumps(default_config))
             
         # 创建图片目录
         images_dir = default_dir / 'images'
@@ -130,9 +148,8 @@ class SkinManager:
             skin_path = self.available_skins[skin_name]
             config_file = skin_path / 'config.json'
             
-            with open(config_file, 'r', encoding='utf-8') as f:
-                config_data = json.load(f)
-                
+            config_data = json_loads(config_file.read_bytes())
+            
             # 创建皮肤配置对象
             self.current_skin = SkinConfig(
                 name=config_data['name'],
@@ -140,21 +157,40 @@ class SkinManager:
                 version=config_data['version'],
                 description=config_data['description'],
                 
-                note_colors=config_data.get('note_colors', {}),
-                judgment_line_color=config_data.get('judgment_line_color', [1.0, 1.0, 1.0]),
-                background_color=config_data.get('background_color', [0.1, 0.1, 0.1]),
-                ui_primary_color=config_data.get('ui_primary_color', [0.2, 0.6, 1.0]),
-                ui_secondary_color=config_data.get('ui_secondary_color', [0.3, 0.3, 0.3]),
+                note_colors=MappingProxyType({
+                    note_type: _as_color(color)
+                    for note_type, color in config_data.get('note_colors', {}).items()
+                }),
+                judgment_line_color=_as_color(config_data.get('judgment_line_color', [1.0, 1.0, 1.0])),
+                background_color=_as_color(config_data.get('background_color', [0.1, 0.1, 0.1])),
+                ui_primary_color=_as_color(config_data.get('ui_primary_color', [0.2, 0.6, 1.0])),
+                ui_secondary_color=_as_color(config_data.get('ui_secondary_color', [0.3, 0.3, 0.3])),
                 
                 font_name=config_data.get('font_name', 'default'),
-                font_sizes=config_data.get('font_sizes', {}),
+                font_sizes=MappingProxyType(config_data.get('font_sizes', {})),
                 
-                images=config_data.get('images', {}),
+                images=MappingProxyType(config_data.get('images', {})),
                 
                 particle_effects=config_data.get('particle_effects', True),
                 animation_speed=config_data.get('animation_speed', 1.0)
             )
             
+            # 切换皮肤后图片路径需要重新解析
+            self._skin_path = skin_path
+            self._image_cache.clear()
+            
+            # 预先生成颜色键的查找表（音符颜色使用驻留后的 note_<类型> 键）
+            skin = self.current_skin
+            self._color_map = {
+                'background': skin.background_color,
+                'judgment_line': skin.judgment_line_color,
+                'ui_primary': skin.ui_primary_color,
+                'ui_secondary': skin.ui_secondary_color,
+            }
+            for note_type, color in skin.note_colors.items():
+                key = NOTE_KEYS.get(note_type) or sys.intern(f'note_{note_type}')
+                self._color_map[key] = color
+            
             # 保存当前皮肤
             config.set('skin.current_skin', skin_name)
             
@@ -165,42 +201,26 @@ class SkinManager:
             return False
             
     def get_image(self, image_key: str) -> Optional[Path]:
-        """获取皮肤中的图片路径"""
-        if not self.current_skin:
-            return None
-            
-        image_name = self.current_skin.images.get(image_key)
-        if not image_name:
-            return None
+        """获取皮肤中的图片路径（解析结果会被缓存）"""
+        if image_key in self._image_cache:
+            return self._image_cache[image_key]
             
-        skin_path = self.available_skins.get(self.current_skin.name)
-        if not skin_path:
+        if not self.current_skin or not self._skin_path:
             return None
             
-        image_path = skin_path / 'images' / image_name
-        if image_path.exists():
-            return image_path
-            
-        return None
+        image_path = None
+        image_name = self.current_skin.images.get(image_key)
+        if image_name:
+            candidate = self._skin_path / 'images' / image_name
+            if candidate.exists():
+                image_path = candidate
+                
+        self._image_cache[image_key] = image_path
+        return image_path
         
-    def get_color(self, color_key: str) -> Optional[list]:
-        """获取皮肤中的颜色"""
-        if not self.current_skin:
-            return None
-            
-        if color_key == 'background':
-            return self.current_skin.background_color
-        elif color_key == 'judgment_line':
-            return self.current_skin.judgment_line_color
-        elif color_key == 'ui_primary':
-            return self.current_skin.ui_primary_color
-        elif color_key == 'ui_secondary':
-            return self.current_skin.ui_secondary_color
-        elif color_key.startswith('note_'):
-            note_type = color_key[5:]
-            return self.current_skin.note_colors.get(note_type)
-            
-        return None
+    def get_color(self, color_key: str) -> Optional[np.ndarray]:
+        """获取皮肤中的颜色（float32数组）"""
+        return self._color_map.get(color_key)
         
     def list_skins(self) -> list:
         """列出所有可用皮肤"""
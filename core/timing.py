@@ -4,16 +4,78 @@
 处理BPM变化、节拍映射和音画同步
 """
 import time
-from typing import List, Tuple, Optional, Dict
+import math
+from bisect import bisect_right
+from fractions import Fraction
+from typing import List, Tuple, Optional, Union
 from dataclasses import dataclass
 
-@dataclass
+import numpy as np
+
+from ._numba import njit, NUMBA_AVAILABLE
+
+
+@njit(cache=True)
+def _beats_to_times(beats, seg_beats, seg_times, seg_spb, out):
+    """
+    分段线性换算内核：逐个二分查找所在BPM分段并换算为时间
+    
+    Args:
+        beats: 浮点拍数数组
+        seg_beats: 分段起始拍数（升序，首项为0）
+        seg_times: 分段起始时间
+        seg_spb: 分段每拍秒数
+        out: 输出数组，与beats等长
+    """
+    seg_count = seg_beats.shape[0]
+    for i in range(beats.shape[0]):
+        b = beats[i]
+        # 与单次换算一致：负拍数（以及NaN）按第0拍查找分段，即落在第0拍的BPM变化点上
+        key = b if b > 0.0 else 0.0
+        lo = 0
+        hi = seg_count
+        while lo < hi - 1:
+            mid = (lo + hi) // 2
+            if seg_beats[mid] <= key:
+                lo = mid
+            else:
+                hi = mid
+        out[i] = seg_times[lo] + (b - seg_beats[lo]) * seg_spb[lo]
+
+
+if NUMBA_AVAILABLE:
+    # 导入时预热JIT，避免编译耗时计入首次加载谱面
+    _beats_to_times(np.zeros(1), np.zeros(1), np.zeros(1), np.ones(1), np.empty(1))
+
+
+def beat_to_float(beat: Union[float, List[float]]) -> float:
+    """
+    将拍数转换为浮点数
+    支持浮点数或Malody格式的 [整数拍, 分子, 分母]
+    """
+    if isinstance(beat, (int, float)):
+        return float(beat)
+    if len(beat) == 3:
+        whole, num, den = beat
+        return whole + num / den
+    return float(beat[0])
+    
+    
+def float_to_beat(beat: float, max_denominator: int = 4096) -> List[int]:
+    """将浮点拍数还原为Malody格式的 [整数拍, 分子, 分母]（用于保存谱面）"""
+    frac = Fraction(beat).limit_denominator(max_denominator)
+    whole = math.floor(frac)
+    rest = frac - whole
+    return [whole, rest.numerator, rest.denominator]
+
+
+@dataclass(slots=True)
 class TimeSignature:
     """拍号"""
     numerator: int = 4  # 每小节拍数
     denominator: int = 4  # 音符类型（4=四分音符）
     
-@dataclass
+@dataclass(slots=True)
 class BPMChange:
     """BPM变化点"""
     beat: float  # 拍数位置
@@ -24,16 +86,29 @@ class TimingSystem:
     """
     时间系统 - 将拍数映射到时间
     
-    Malody谱面格式：note.beat = [拍数, 分子, 分母]
+    Malody谱面格式：beat = [拍数, 分子, 分母]
     例如 [2, 1, 4] = 第2拍 + 1/4拍 = 2.25拍
+    解析后的谱面统一使用浮点拍数（2.25）
     """
     
     def __init__(self, bpm: float = 120.0, time_signature: TimeSignature = None):
         self.bpm = bpm
-        self.time_signature = time_signature or TimeSignature()
+        self.time_signature = time_signature or TimeSignature()  # 同时缓存每小节拍数及其倒数
         self.bpm_changes: List[BPMChange] = []
-        self._beat_to_time_cache: Dict[float, float] = {}
-        self._time_to_beat_cache: Dict[float, float] = {}
+        
+        # 分段表（起始拍数/起始时间/每拍秒数/BPM），列表供单次换算二分查找，数组供批量换算
+        self._build_segments()
+        
+    @property
+    def time_signature(self) -> TimeSignature:
+        """拍号"""
+        return self._time_signature
+        
+    @time_signature.setter
+    def time_signature(self, value: TimeSignature) -> None:
+        self._time_signature = value
+        self._numerator = float(value.numerator)
+        self._inv_numerator = 1.0 / self._numerator
         
     def add_bpm_change(self, beat: float, bpm: float) -> None:
         """添加BPM变化点"""
@@ -41,101 +116,53 @@ class TimingSystem:
         self.bpm_changes.sort(key=lambda x: x.beat)
         self._recalculate_timing()
         
-    def beat_to_time(self, beat: List[float]) -> float:
+    def beat_to_time(self, beat: Union[float, List[float]]) -> float:
         """
-        将拍数数组转换为时间（秒）
+        将拍数转换为时间（秒）
         
         Args:
-            beat: [整数拍, 分子, 分母]，如 [2, 1, 4]
+            beat: 总拍数，或 [整数拍, 分子, 分母]，如 [2, 1, 4]
             
         Returns:
             时间（秒）
         """
-        # 计算总拍数
-        if len(beat) == 3:
-            whole, num, den = beat
-            total_beat = whole + (num / den)
-        else:
-            total_beat = float(beat[0])
-            
-        # 检查缓存
-        if total_beat in self._beat_to_time_cache:
-            return self._beat_to_time_cache[total_beat]
-            
-        # 如果没有BPM变化，简单计算
-        if not self.bpm_changes:
-            time_sec = (total_beat * 60) / self.bpm
-            self._beat_to_time_cache[total_beat] = time_sec
-            return time_sec
-            
-        # 处理BPM变化
-        current_beat = 0.0
-        current_time = 0.0
-        current_bpm = self.bpm
+        return self._evaluate(beat_to_float(beat))
         
-        # 找到初始BPM
-        for change in self.bpm_changes:
-            if change.beat <= current_beat:
-                current_bpm = change.bpm
-                current_time = change.time
-            else:
-                break
-                
-        # 分段计算
-        for i, change in enumerate(self.bpm_changes):
-            if change.beat > total_beat:
-                break
-                
-            # 计算到变化点的拍数
-            segment_beats = change.beat - current_beat
-            segment_time = (segment_beats * 60) / current_bpm
-            current_time += segment_time
-            current_beat = change.beat
-            current_bpm = change.bpm
-            
-        # 计算剩余部分
-        remaining_beats = total_beat - current_beat
-        remaining_time = (remaining_beats * 60) / current_bpm
-        total_time = current_time + remaining_time
+    def _evaluate(self, total_beat: float) -> float:
+        """按分段表将浮点拍数换算为时间"""
+        # 二分查找所在的BPM分段（负拍数沿用第0拍所在的分段）
+        i = bisect_right(self._segment_beat_list, max(total_beat, 0.0)) - 1
+        return self._segment_time_list[i] + (total_beat - self._segment_beat_list[i]) * self._segment_spb_list[i]
         
-        self._beat_to_time_cache[total_beat] = total_time
-        return total_time
+    def beat_to_time_batch(self, beats: np.ndarray) -> np.ndarray:
+        """
+        批量将拍数转换为时间（秒）
         
-    def time_to_beat(self, time_sec: float) -> float:
-        """将时间（秒）转换为拍数"""
-        if time_sec in self._time_to_beat_cache:
-            return self._time_to_beat_cache[time_sec]
+        Args:
+            beats: 浮点拍数数组（NaN会原样得到NaN）
             
-        if not self.bpm_changes:
-            beat = (time_sec * self.bpm) / 60
-            self._time_to_beat_cache[time_sec] = beat
-            return beat
+        Returns:
+            与beats等长的时间数组
+        """
+        beats = np.ascontiguousarray(beats, dtype=np.float64)
+        if not NUMBA_AVAILABLE:
+            idx = np.searchsorted(self._segment_beats, np.maximum(beats, 0.0), side='right') - 1
+            return self._segment_times[idx] + (beats - self._segment_beats[idx]) * self._segment_spb[idx]
             
-        # 处理BPM变化
-        current_beat = 0.0
-        current_time = 0.0
-        current_bpm = self.bpm
+        out = np.empty_like(beats)
+        _beats_to_times(beats, self._segment_beats, self._segment_times, self._segment_spb, out)
+        return out
         
-        for change in self.bpm_changes:
-            if change.time <= time_sec:
-                current_bpm = change.bpm
-                current_time = change.time
-                current_beat = change.beat
-            else:
-                break
-                
-        remaining_time = time_sec - current_time
-        remaining_beats = (remaining_time * current_bpm) / 60
-        total_beat = current_beat + remaining_beats
-        
-        self._time_to_beat_cache[time_sec] = total_beat
-        return total_beat
+    def time_to_beat(self, time_sec: float) -> float:
+        """将时间（秒）转换为拍数"""
+        # 二分查找所在的BPM分段
+        i = bisect_right(self._segment_time_list, time_sec) - 1
+        if i < 0:
+            i = 0
+        return self._segment_beat_list[i] + (time_sec - self._segment_time_list[i]) / self._segment_spb_list[i]
         
     def _recalculate_timing(self) -> None:
         """重新计算BPM变化点的时间位置"""
-        self._beat_to_time_cache.clear()
-        self._time_to_beat_cache.clear()
-        
         if not self.bpm_changes:
             return
             
@@ -157,22 +184,31 @@ class TimingSystem:
             change.time = current_time
             current_bpm = change.bpm
             
+        self._build_segments()
+        
+    def _build_segments(self) -> None:
+        """根据初始BPM和BPM变化点生成分段表"""
+        self._segment_beat_list = [0.0] + [c.beat for c in self.bpm_changes]
+        self._segment_time_list = [0.0] + [c.time for c in self.bpm_changes]
+        self._segment_spb_list = [60.0 / self.bpm] + [60.0 / c.bpm for c in self.bpm_changes]
+        self._segment_bpm_list = [self.bpm] + [c.bpm for c in self.bpm_changes]
+        
+        self._segment_beats = np.array(self._segment_beat_list, dtype=np.float64)
+        self._segment_times = np.array(self._segment_time_list, dtype=np.float64)
+        self._segment_spb = np.array(self._segment_spb_list, dtype=np.float64)
+            
     def get_current_bpm(self, current_time: float) -> float:
         """获取当前时间的BPM"""
         if not self.bpm_changes:
             return self.bpm
             
-        for i, change in enumerate(self.bpm_changes):
-            if change.time <= current_time:
-                if i == len(self.bpm_changes) - 1 or self.bpm_changes[i + 1].time > current_time:
-                    return change.bpm
-                    
-        return self.bpm
+        # 二分查找所在的BPM分段（第一个变化点之前沿用初始BPM）
+        i = bisect_right(self._segment_time_list, current_time) - 1
+        return self._segment_bpm_list[max(i, 0)]
         
     def get_beat_phase(self, current_time: float) -> float:
         """获取当前时间在小节中的相位（0-1）"""
-        beat = self.time_to_beat(current_time)
-        return beat % self.time_signature.numerator / self.time_signature.numerator
+        return (self.time_to_beat(current_time) % self._numerator) * self._inv_numerator
 
 
 class GameClock:
@@ -180,6 +216,11 @@ class GameClock:
     游戏时钟 - 管理游戏时间，支持暂停、变速
     """
     
+    __slots__ = (
+        'real_time', 'game_time', 'paused', 'time_scale', 'audio_offset',
+        '_last_update_time', '_run_scale',
+    )
+    
     def __init__(self):
         self.real_time = 0.0  # 真实时间
         self.game_time = 0.0  # 游戏时间（受暂停和变速影响）
@@ -187,6 +228,7 @@ class GameClock:
         self.time_scale = 1.0  # 时间缩放
         self.audio_offset = 0.0  # 音频延迟补偿
         self._last_update_time = 0.0  # 最后更新时间
+        self._run_scale = 1.0  # 实际推进倍率（暂停时为0，否则等于time_scale）
         
     def start(self) -> None:
         """开始/重置时钟"""
@@ -194,25 +236,29 @@ class GameClock:
         self.game_time = 0.0
         self.paused = False
         self.time_scale = 1.0
+        self._run_scale = 1.0
         self._last_update_time = time.time()
         
     def update(self, dt: float) -> None:
         """更新时钟"""
         self.real_time += dt
-        if not self.paused:
-            self.game_time += dt * self.time_scale
+        self.game_time += dt * self._run_scale
             
     def pause(self) -> None:
         """暂停"""
         self.paused = True
+        self._run_scale = 0.0
         
     def resume(self) -> None:
         """恢复"""
         self.paused = False
+        self._run_scale = self.time_scale
         
     def set_time_scale(self, scale: float) -> None:
         """设置时间缩放"""
         self.time_scale = scale
+        if not self.paused:
+            self._run_scale = scale
         
     def get_audio_time(self) -> float:
         """获取音频时间（考虑延迟补偿）"""
@@ -3,11 +3,21 @@
 全局日志配置
 """
 import logging
+import queue
 import sys
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 
+# 后台日志线程（由它负责实际的文件/控制台写入）
+listener = None
+
 def setup_global_logging():
-    """设置全局日志配置"""
+    """设置全局日志配置（重复调用时直接返回已配置的日志器）"""
+    global listener
+    main_logger = logging.getLogger('mystia')
+    if main_logger.handlers:
+        return main_logger
+        
     # 获取项目根目录
     root_dir = Path(__file__).parent
     
@@ -34,17 +44,17 @@ def setup_global_logging():
     console_handler.setLevel(logging.INFO)
     console_handler.setFormatter(formatter)
     
-    # 主日志器
-    main_logger = logging.getLogger('mystia')
+    # 游戏循环中只做入队，格式化和写入交给后台线程
+    log_queue = queue.Queue(-1)
+    listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    listener.start()
+    
+    # 主日志器（不向根日志器传播，避免同一条日志输出两次）
     main_logger.setLevel(logging.DEBUG)
     main_logger.propagate = False
     
-    # 清空现有处理器
-    main_logger.handlers.clear()
-    
     # 添加处理器
-    main_logger.addHandler(file_handler)
-    main_logger.addHandler(console_handler)
+    main_logger.addHandler(QueueHandler(log_queue))
     
     # 配置kivy日志器
     kivy_logger = logging.getLogger('kivy')
@@ -52,5 +62,16 @@ def setup_global_logging():
     
     return main_logger
 
+
+def stop_logging():
+    """停止后台日志线程，写出队列中剩余的日志"""
+    global listener
+    logging.getLogger('mystia').handlers.clear()
+    if listener is not None:
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+        listener = None
+
 # 创建全局日志器
 logger = setup_global_logging()
\ No newline at end of file
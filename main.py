@@ -4,6 +4,8 @@
 """
 import sys
 import os
+import importlib
+from functools import partial
 from pathlib import Path
 
 # 添加项目根目录到sys.path
@@ -13,7 +15,7 @@ sys.path.insert(0, str(Path(__file__).parent))
 sys.setrecursionlimit(10000)
 
 # 导入日志配置
-from log_config import logger
+from log_config import logger, stop_logging
 
 logger.info("应用启动初始化")
 
@@ -25,12 +27,37 @@ from kivy.clock import Clock
 # 导入配置
 from config import config
 from core.game_engine import GameEngine
-from ui.menu import MenuScreen
-from ui.song_select import SongSelectScreen
-from ui.play_ui import PlayUI
-from ui.pause_screen import PauseScreen
-from ui.result_ui import ResultScreen
-from ui.settings_screen import SettingsScreen
+
+# 屏幕名称 -> (模块, 类名)，除菜单外都在首次切换到该屏幕时才导入和创建
+SCREEN_CLASSES = {
+    'menu': ('ui.menu', 'MenuScreen'),
+    'song_select': ('ui.song_select', 'SongSelectScreen'),
+    'play': ('ui.play_ui', 'PlayUI'),
+    'pause': ('ui.pause_screen', 'PauseScreen'),
+    'result': ('ui.result_ui', 'ResultScreen'),
+    'settings': ('ui.settings_screen', 'SettingsScreen'),
+}
+
+
+class LazyScreenManager(ScreenManager):
+    """按需创建屏幕的屏幕管理器（切换到尚未创建的屏幕时调用其工厂函数）"""
+    
+    def __init__(self, **kwargs):
+        self._factories = {}
+        super().__init__(**kwargs)
+        
+    def register_factory(self, name, factory) -> None:
+        """注册屏幕工厂函数"""
+        self._factories[name] = factory
+        
+    def on_current(self, instance, value):
+        factory = self._factories.pop(value, None)
+        if factory is not None and not self.has_screen(value):
+            screen = factory()
+            screen.name = value
+            self.add_widget(screen)
+        super().on_current(instance, value)
+
 
 class MystiaRhythmApp(App):
     """主应用类"""
@@ -61,48 +88,14 @@ class MystiaRhythmApp(App):
             self.game_engine = GameEngine(self)
             
             # 创建屏幕管理器
-            self.screen_manager = ScreenManager(transition=FadeTransition())
-            
-            # 创建各个屏幕
-            menu_screen = MenuScreen(
-                game_engine=self.game_engine
-            )
-            menu_screen.name = 'menu'
-            
-            song_select_screen = SongSelectScreen(
-                game_engine=self.game_engine
-            )
-            song_select_screen.name = 'song_select'
-            
-            play_screen = PlayUI(
-                game_engine=self.game_engine
-            )
-            play_screen.name = 'play'
-            self.game_engine.play_ui = play_screen
+            self.screen_manager = LazyScreenManager(transition=FadeTransition())
             
-            pause_screen = PauseScreen(
-                game_engine=self.game_engine
-            )
-            pause_screen.name = 'pause'
+            # 只创建菜单屏幕，其余屏幕在首次切换时创建
+            for name in SCREEN_CLASSES:
+                if name != 'menu':
+                    self.screen_manager.register_factory(name, partial(self._create_screen, name))
+            self.screen_manager.add_widget(self._create_screen('menu'))
             
-            result_screen = ResultScreen(
-                game_engine=self.game_engine
-            )
-            result_screen.name = 'result'
-            
-            # 修复：实例化SettingsScreen而不是直接添加类
-            settings_screen = SettingsScreen(
-                game_engine=self.game_engine
-            )
-            settings_screen.name = 'settings'
-            
-            # 添加屏幕
-            self.screen_manager.add_widget(menu_screen)
-            self.screen_manager.add_widget(song_select_screen)
-            self.screen_manager.add_widget(play_screen)
-            self.screen_manager.add_widget(pause_screen)
-            self.screen_manager.add_widget(result_screen)
-            self.screen_manager.add_widget(settings_screen)  # 修复：添加实例
             # 设置初始屏幕为菜单
             self.screen_manager.current = 'menu'
             
@@ -117,6 +110,17 @@ class MystiaRhythmApp(App):
             logger.error(traceback.format_exc())
             raise
         
+    def _create_screen(self, name: str):
+        """导入并创建指定屏幕"""
+        module_name, class_name = SCREEN_CLASSES[name]
+        screen_class = getattr(importlib.import_module(module_name), class_name)
+        screen = screen_class(game_engine=self.game_engine)
+        screen.name = name
+        if name == 'play':
+            self.game_engine.play_ui = screen
+        logger.debug("创建屏幕: %s", name)
+        return screen
+        
     def on_start(self):
         """应用启动时调用"""
         logger.info("应用已启动")
@@ -131,6 +135,7 @@ class MystiaRhythmApp(App):
         logger.info("=" * 60)
         logger.info("Mystia Rhythm 应用已关闭")
         logger.info("=" * 60)
+        stop_logging()
 
 
 def main():
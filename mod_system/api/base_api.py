@@ -0,0 +1,87 @@
+# mystia_rhythm/mod_system/api/base_api.py
+"""
+Mod API基类
+统一各API的权限检查
+"""
+from functools import lru_cache, wraps
+from keyword import iskeyword
+from typing import Any, Callable, Dict, FrozenSet, Optional
+
+from mod_system.permission_system import Permission
+
+
+def requires(permission: Permission, fail: Any = False):
+    """
+    权限检查装饰器：没有权限时不调用方法，直接返回fail
+    
+    Args:
+        permission: 方法需要的权限
+        fail: 没有权限时的返回值（应为不可变对象）
+    """
+    bit = permission.bit
+    
+    def decorator(func):
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            if self._perm_mask & bit:
+                return func(self, *args, **kwargs)
+            return fail
+        return wrapper
+    return decorator
+
+
+@lru_cache(maxsize=32)
+def make_setter(keys: FrozenSet[str]) -> Optional[Callable[[Any, Dict[str, Any]], None]]:
+    """
+    为固定的属性名集合生成批量赋值函数 setter(obj, values)
+    Mod每帧用同一组属性名修改对象时，省去逐个setattr的循环
+    
+    Args:
+        keys: 属性名集合
+        
+    Returns:
+        赋值函数；属性名不是合法标识符时返回None（由调用方逐个setattr）
+    """
+    if not all(key.isidentifier() and not iskeyword(key) for key in keys):
+        return None
+        
+    body = ''.join(f'    obj.{key} = values[{key!r}]\n' for key in sorted(keys)) or '    pass\n'
+    namespace = {}
+    exec(f'def setter(obj, values):\n{body}', namespace)
+    return namespace['setter']
+
+
+def set_attributes(obj: Any, values: Dict[str, Any]) -> None:
+    """按values批量设置obj的属性"""
+    setter = make_setter(frozenset(values))
+    if setter is not None:
+        setter(obj, values)
+        return
+        
+    for key, value in values.items():
+        setattr(obj, key, value)
+
+
+class BaseAPI:
+    """Mod API基类（持有本Mod的权限位掩码，权限变化时由权限管理器通知刷新）"""
+    
+    def __init__(self, mod_instance):
+        self.mod_instance = mod_instance
+        self.game_engine = mod_instance.game_engine
+        
+        # 权限管理器在创建API时解析一次
+        mod_manager = getattr(self.game_engine, 'mod_manager', None)
+        self._permission_manager = getattr(mod_manager, 'permission_manager', None)
+        self._perm_mask = 0
+        if self._permission_manager is not None:
+            self._permission_manager.add_listener(self)
+            self.invalidate_permissions()
+        
+    def invalidate_permissions(self) -> None:
+        """重新获取权限位掩码（权限授予/撤销后调用）"""
+        if self._permission_manager is not None:
+            self._perm_mask = self._permission_manager.get_mask(self.mod_instance.manifest.mod_id)
+        
+    def _check_permission(self, permission: Permission) -> bool:
+        """检查权限"""
+        return self._perm_mask & permission.bit != 0
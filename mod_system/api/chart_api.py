@@ -3,25 +3,34 @@
 谱面操作API
 提供给Mod的谱面操作接口
 """
-from typing import Dict, List, Optional, Any
+from bisect import bisect_right
+from dataclasses import fields
+from operator import attrgetter
+from typing import Dict, List, Optional, Any, Union
 from pathlib import Path
 
 from mod_system.permission_system import Permission
+from mod_system.api.base_api import BaseAPI, requires, make_setter
 from core.chart_parser import Chart, Note, NoteType, ChartParser
+from core.timing import beat_to_float
 
 
-class ChartAPI:
+# 音符排序键
+_note_beat = attrgetter('beat')
+
+# 可由Mod修改的音符属性（其余属性名忽略）
+_NOTE_FIELDS = frozenset(f.name for f in fields(Note))
+
+
+class ChartAPI(BaseAPI):
     """谱面操作API"""
     
     def __init__(self, mod_instance):
-        self.mod_instance = mod_instance
-        self.game_engine = mod_instance.game_engine
+        super().__init__(mod_instance)
         
+    @requires(Permission.ACCESS_CHART_DATA, fail=None)
     def get_current_chart(self) -> Optional[Chart]:
         """获取当前谱面"""
-        if not self._check_permission(Permission.ACCESS_CHART_DATA):
-            return None
-            
         return self.game_engine.current_chart
         
     def get_notes(self) -> List[Note]:
@@ -29,120 +38,130 @@ class ChartAPI:
         if not self._check_permission(Permission.ACCESS_CHART_DATA):
             return []
             
-        if not self.game_engine.current_chart:
+        chart = self.game_engine.current_chart
+        if not chart:
             return []
             
-        return self.game_engine.current_chart.notes
+        return chart.notes
         
     def add_note(self, note: Note) -> bool:
-        """添加音符（实时）"""
-        if not self._check_permission(Permission.MODIFY_CHART):
+        """添加音符（实时，按拍数插入以保持notes有序）"""
+        # 先做不涉及权限的检查，常见的拒绝路径不必查权限
+        chart = self.game_engine.current_chart
+        if not chart:
             return False
             
-        if not self.game_engine.current_chart:
+        if not self._check_permission(Permission.MODIFY_CHART):
             return False
             
-        self.game_engine.current_chart.notes.append(note)
-        
-        # 重新计算时间
-        self._recalculate_timing()
+        # 只需计算新音符的时间
+        self._retime_note(chart, note)
+        self._insert_note(chart, note)
+        self._notes_changed(chart)
         return True
         
     def remove_note(self, index: int) -> bool:
         """移除音符"""
-        if not self._check_permission(Permission.MODIFY_CHART):
+        chart = self.game_engine.current_chart
+        if not chart or not 0 <= index < len(chart.notes):
             return False
             
-        if not self.game_engine.current_chart:
+        if not self._check_permission(Permission.MODIFY_CHART):
             return False
             
-        if 0 <= index < len(self.game_engine.current_chart.notes):
-            self.game_engine.current_chart.notes.pop(index)
-            self._recalculate_timing()
-            return True
-            
-        return False
+        chart.notes.pop(index)
+        self.game_engine.judgment.remove_note(index)
+        self._notes_changed(chart)
+        return True
         
     def modify_note(self, index: int, **kwargs) -> bool:
-        """修改音符属性"""
-        if not self._check_permission(Permission.MODIFY_CHART):
+        """
+        修改音符属性
+        beat/endbeat 可以是总拍数，也可以是 [整数拍, 分子, 分母]
+        """
+        chart = self.game_engine.current_chart
+        if not chart or not 0 <= index < len(chart.notes):
             return False
             
-        if not self.game_engine.current_chart:
+        if not self._check_permission(Permission.MODIFY_CHART):
             return False
             
-        if 0 <= index < len(self.game_engine.current_chart.notes):
-            note = self.game_engine.current_chart.notes[index]
-            for key, value in kwargs.items():
-                if hasattr(note, key):
-                    setattr(note, key, value)
-                    
-            self._recalculate_timing()
-            return True
+        # 拍数统一换算为浮点数
+        if 'beat' in kwargs:
+            kwargs['beat'] = beat_to_float(kwargs['beat'])
+        if kwargs.get('endbeat') is not None:
+            kwargs['endbeat'] = beat_to_float(kwargs['endbeat'])
             
-        return False
+        note = chart.notes[index]
+        # 音符字段名都是合法标识符，生成的赋值函数不会为None
+        make_setter(_NOTE_FIELDS.intersection(kwargs))(note, kwargs)
+        self._retime_note(chart, note)
+        
+        # 拍数改变后移到新的有序位置（判定状态随音符一起移动）
+        if 'beat' in kwargs:
+            chart.notes.pop(index)
+            result = self.game_engine.judgment.remove_note(index)
+            self._insert_note(chart, note, result)
+            
+        self._notes_changed(chart)
+        return True
         
+    @requires(Permission.ACCESS_CHART_DATA, fail=None)
     def get_timing_system(self):
         """获取时间系统"""
-        if not self._check_permission(Permission.ACCESS_CHART_DATA):
-            return None
-            
-        if not self.game_engine.current_chart:
+        chart = self.game_engine.current_chart
+        if not chart:
             return None
             
-        return self.game_engine.current_chart.timing_system
+        return chart.timing_system
         
+    @requires(Permission.LOAD_CHART)
     def load_chart(self, chart_path: Path) -> bool:
         """加载谱面"""
-        if not self._check_permission(Permission.LOAD_CHART):
-            return False
-            
         chart = ChartParser.load_from_file(chart_path)
         if chart:
             return self.game_engine.load_chart(chart)
         return False
         
+    @requires(Permission.WRITE_FILES)
     def save_chart(self, chart_path: Path) -> bool:
         """保存当前谱面"""
-        if not self._check_permission(Permission.WRITE_FILES):
-            return False
-            
-        if not self.game_engine.current_chart:
+        chart = self.game_engine.current_chart
+        if not chart:
             return False
             
-        return ChartParser.save_to_file(
-            self.game_engine.current_chart, chart_path
-        )
+        return ChartParser.save_to_file(chart, chart_path)
         
-    def create_note(self, beat: List[float], column: int, 
+    def create_note(self, beat: Union[float, List[float]], column: int, 
                    note_type: NoteType = NoteType.TAP, 
-                   endbeat: Optional[List[float]] = None) -> Note:
-        """创建音符对象"""
+                   endbeat: Optional[Union[float, List[float]]] = None) -> Note:
+        """
+        创建音符对象
+        beat/endbeat 可以是总拍数，也可以是 [整数拍, 分子, 分母]
+        """
         return Note(
-            beat=beat,
+            beat=beat_to_float(beat),
             column=column,
-            endbeat=endbeat,
+            endbeat=beat_to_float(endbeat) if endbeat is not None else None,
             type=note_type
         )
         
-    def _recalculate_timing(self) -> None:
-        """重新计算时间（添加/移除音符后需要调用）"""
-        # 这里需要重新计算note_times等
-        if self.game_engine.current_chart:
-            chart = self.game_engine.current_chart
-            timing = chart.timing_system
-            
-            # 重新计算每个音符的时间
-            for note in chart.notes:
-                note.time = timing.beat_to_time(note.beat)
-                if note.endbeat:
-                    note.end_time = timing.beat_to_time(note.endbeat)
-                    
-    def _check_permission(self, permission: Permission) -> bool:
-        """检查权限"""
-        mod_manager = self.game_engine.mod_manager
-        if hasattr(mod_manager, 'permission_manager'):
-            return mod_manager.permission_manager.check_permission(
-                self.mod_instance.manifest.mod_id, permission
-            )
-        return False
\ No newline at end of file
+    def _retime_note(self, chart: Chart, note: Note) -> None:
+        """重新计算单个音符的时间（音符的时间只取决于自身拍数和BPM变化）"""
+        timing = chart.timing_system
+        note.time = timing.beat_to_time(note.beat)
+        if note.endbeat is not None:
+            note.duration = timing.beat_to_time(note.endbeat) - note.time
+        else:
+            note.duration = 0.0
+            
+    def _insert_note(self, chart: Chart, note: Note, result=None) -> None:
+        """按拍数把音符插入notes的有序位置，并同步插入判定状态"""
+        index = bisect_right(chart.notes, note.beat, key=_note_beat)
+        chart.notes.insert(index, note)
+        self.game_engine.judgment.insert_note(index, result)
+        
+    def _notes_changed(self, chart: Chart) -> None:
+        """音符增删改后丢弃列式数组，并让游戏引擎重新生成轨道数组"""
+        chart.note_arrays.clear()
+        self.game_engine.refresh_note_arrays()
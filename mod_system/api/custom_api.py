@@ -3,84 +3,155 @@
 自定义数据API
 提供给Mod的自定义数据存储接口
 """
-import json
-from typing import Dict, List, Optional, Any
+import atexit
+import logging
+import threading
+import weakref
+from typing import Dict, List, Optional, Any, Set
 from pathlib import Path
 
 from mod_system.permission_system import Permission
+from mod_system.api.base_api import BaseAPI, requires
 from config import SAVES_DIR
+from utils.json_utils import json_loads, json_dumps
 
+logger = logging.getLogger(__name__)
 
-class CustomAPI:
+# 缓存中表示"磁盘上没有该键"的标记
+_MISSING = object()
+
+# 所有CustomAPI实例（弱引用，不阻止卸载后的Mod被回收），退出时统一写盘
+_instances = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_all() -> None:
+    """退出时写出所有实例尚未保存的数据"""
+    for api in list(_instances):
+        api.flush()
+
+
+class CustomAPI(BaseAPI):
     """自定义数据API（用于RPG Mod等）"""
     
+    # save_data之后延迟写盘的时间（秒），期间的多次修改只写一次文件
+    FLUSH_DELAY = 1.0
+    
     def __init__(self, mod_instance):
-        self.mod_instance = mod_instance
-        self.game_engine = mod_instance.game_engine
+        super().__init__(mod_instance)
         
         # Mod特定的数据目录
         self.mod_data_dir = SAVES_DIR / self.mod_instance.manifest.mod_id
         self.mod_data_dir.mkdir(parents=True, exist_ok=True)
         
+        # 延迟写回缓存：键 -> 序列化后的JSON bytes（与调用方的对象互不影响），以及尚未写盘的键
+        self._cache: Dict[str, Any] = {}
+        self._dirty: Set[str] = set()
+        self._flush_timer: Optional[threading.Timer] = None
+        self._flush_lock = threading.Lock()
+        _instances.add(self)
+        
+        # 键 -> 数据文件路径
+        self._path_cache: Dict[str, Path] = {}
+        
+        # 已有数据的键（启动时扫描一次目录，之后随保存/删除维护）
+        self._keys: Set[str] = {file.stem for file in self.mod_data_dir.glob("*.json")}
+        
+    @requires(Permission.WRITE_FILES)
     def save_data(self, key: str, data: Any) -> bool:
-        """保存自定义数据"""
-        if not self._check_permission(Permission.WRITE_FILES):
-            return False
-            
+        """保存自定义数据（先写入缓存，延迟写盘）"""
+        # 立即序列化：无法保存的数据直接返回False，之后调用方修改对象也不影响已保存的内容
         try:
-            file_path = self.mod_data_dir / f"{key}.json"
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
-            return True
-        except Exception as e:
-            print(f"保存数据失败: {e}")
+            payload = json_dumps(data, indent=False)
+        except Exception:
+            logger.exception("保存数据失败: %s", key)
             return False
             
+        with self._flush_lock:
+            self._cache[key] = payload
+            self._dirty.add(key)
+            self._keys.add(key)
+            if self._flush_timer:
+                self._flush_timer.cancel()
+            self._flush_timer = threading.Timer(self.FLUSH_DELAY, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+        return True
+        
+    def _path(self, key: str) -> Path:
+        """获取键对应的数据文件路径（缓存，避免重复拼接Path）"""
+        path = self._path_cache.get(key)
+        if path is None:
+            path = self._path_cache[key] = self.mod_data_dir / (key + '.json')
+        return path
+        
     def load_data(self, key: str, default: Any = None) -> Any:
-        """加载自定义数据"""
+        """加载自定义数据（优先读取缓存）"""
         if not self._check_permission(Permission.READ_FILES):
             return default
             
-        try:
-            file_path = self.mod_data_dir / f"{key}.json"
-            if not file_path.exists():
+        payload = self._cache.get(key)
+        if payload is None:
+            try:
+                payload = self._path(key).read_bytes()
+            except FileNotFoundError:
+                payload = _MISSING
+            except Exception:
+                logger.exception("加载数据失败: %s", key)
                 return default
-                
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception as e:
-            print(f"加载数据失败: {e}")
+            self._cache[key] = payload
+            
+        if payload is _MISSING:
             return default
             
+        # 每次返回新解析的对象，调用方修改它不会影响缓存
+        try:
+            return json_loads(payload)
+        except Exception:
+            logger.exception("加载数据失败: %s", key)
+            return default
+        
+    @requires(Permission.WRITE_FILES)
     def delete_data(self, key: str) -> bool:
         """删除自定义数据"""
-        if not self._check_permission(Permission.WRITE_FILES):
-            return False
+        # 删除文件也在锁内进行，避免定时写盘在删除前后把旧数据写回
+        with self._flush_lock:
+            self._cache[key] = _MISSING
+            self._dirty.discard(key)
+            self._keys.discard(key)
             
-        try:
-            file_path = self.mod_data_dir / f"{key}.json"
-            if file_path.exists():
-                file_path.unlink()
-            return True
-        except Exception as e:
-            print(f"删除数据失败: {e}")
-            return False
+            try:
+                self._path(key).unlink(missing_ok=True)
+                return True
+            except Exception:
+                logger.exception("删除数据失败: %s", key)
+                return False
             
     def list_data_keys(self) -> List[str]:
         """列出所有数据键"""
         if not self._check_permission(Permission.READ_FILES):
             return []
             
-        keys = []
-        for file in self.mod_data_dir.glob("*.json"):
-            keys.append(file.stem)
-        return keys
+        return list(self._keys)
+        
+    def flush(self) -> None:
+        """将尚未写盘的数据写入文件"""
+        with self._flush_lock:
+            if self._flush_timer:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            dirty = self._dirty
+            self._dirty = set()
+            
+            for key in dirty:
+                try:
+                    self._path(key).write_bytes(self._cache[key])
+                except Exception:
+                    logger.exception("保存数据失败: %s", key)
         
+    @requires(Permission.MODIFY_HEALTH)
     def set_health(self, health: float) -> bool:
         """设置血量（用于RPG Mod）"""
-        if not self._check_permission(Permission.MODIFY_HEALTH):
-            return False
-            
         # 注意：本体不做死亡判定，但Mod可以添加血量系统
         # 这里只是存储数据，实际效果由Mod自己实现
         return self.save_data("health", health)
@@ -103,12 +174,3 @@ class CustomAPI:
     def load_game_state(self) -> Optional[Dict[str, Any]]:
         """加载游戏状态"""
         return self.load_data("game_state")
-        
-    def _check_permission(self, permission: Permission) -> bool:
-        """检查权限"""
-        mod_manager = self.game_engine.mod_manager
-        if hasattr(mod_manager, 'permission_manager'):
-            return mod_manager.permission_manager.check_permission(
-                self.mod_instance.manifest.mod_id, permission
-            )
-        return False
\ No newline at end of file
@@ -6,7 +6,9 @@
 from typing import Dict, List, Optional, Any
 from enum import Enum
 
+from core.events import CALLBACK_EVENTS
 from mod_system.permission_system import Permission
+from mod_system.api.base_api import BaseAPI, requires
 
 
 class GameState(Enum):
@@ -20,47 +22,45 @@ class GameState(Enum):
     EDITOR = 6
 
 
-class GameAPI:
+# 状态值 -> GameState（避免每次调用Enum构造）
+_GAME_STATE_BY_VALUE = {state.value: state for state in GameState}
+
+# Mod可以注册的回调事件（与游戏引擎保持一致）
+_VALID_EVENTS = frozenset(CALLBACK_EVENTS)
+
+
+class GameAPI(BaseAPI):
     """游戏控制API"""
     
     def __init__(self, mod_instance):
-        self.mod_instance = mod_instance
-        self.game_engine = mod_instance.game_engine
+        super().__init__(mod_instance)
         
     def get_game_state(self) -> GameState:
         """获取当前游戏状态"""
-        return GameState(self.game_engine.state.value)
+        return _GAME_STATE_BY_VALUE[self.game_engine.state.value]
         
+    @requires(Permission.PAUSE_GAME)
     def pause_game(self) -> bool:
         """暂停游戏"""
-        if not self._check_permission(Permission.PAUSE_GAME):
-            return False
-            
         self.game_engine.pause_game()
         return True
         
+    @requires(Permission.PAUSE_GAME)
     def resume_game(self) -> bool:
         """恢复游戏"""
-        if not self._check_permission(Permission.PAUSE_GAME):
-            return False
-            
         self.game_engine.resume_game()
         return True
         
+    @requires(Permission.RESTART_GAME)
     def restart_game(self) -> bool:
         """重新开始游戏"""
-        if not self._check_permission(Permission.RESTART_GAME):
-            return False
-            
         self.game_engine.reset_game()
         self.game_engine.start_game()
         return True
         
+    @requires(Permission.EXIT_GAME)
     def exit_game(self) -> bool:
         """退出游戏"""
-        if not self._check_permission(Permission.EXIT_GAME):
-            return False
-            
         # 触发游戏结束
         self.game_engine.end_game()
         return True
@@ -73,29 +73,24 @@ class GameAPI:
         """获取当前分数"""
         return self.game_engine.judgment.get_score()
         
+    @requires(Permission.MODIFY_SCORE)
     def set_score(self, score: int) -> bool:
         """设置分数（用于RPG Mod等）"""
-        if not self._check_permission(Permission.MODIFY_SCORE):
-            return False
-            
         # 注意：直接修改分数可能会影响游戏平衡
         # 这里只是示例，实际应用中可能需要更复杂的逻辑
-        self.game_engine.judgment.calculator.score = score
+        self.game_engine.judgment.calculator.total_score = score
         return True
         
     def get_combo(self) -> int:
         """获取当前连击"""
         return self.game_engine.judgment.get_combo()
         
+    @requires(Permission.MODIFY_COMBO)
     def set_combo(self, combo: int) -> bool:
         """设置连击数"""
-        if not self._check_permission(Permission.MODIFY_COMBO):
-            return False
-            
-        self.game_engine.judgment.calculator.combo = combo
-        self.game_engine.judgment.calculator.max_combo = max(
-            self.game_engine.judgment.calculator.max_combo, combo
-        )
+        calculator = self.game_engine.judgment.calculator
+        calculator.current_combo = combo
+        calculator.max_combo = max(calculator.max_combo, combo)
         return True
         
     def get_accuracy(self) -> float:
@@ -104,22 +99,16 @@ class GameAPI:
         
     def get_judgment_counts(self) -> Dict[str, int]:
         """获取判定统计"""
-        from ...core.judgment_system import Judgment
-        counts = self.game_engine.judgment.calculator.judgments
-        
-        return {
-            'BEST': counts.get(Judgment.BEST, 0),
-            'COOL': counts.get(Judgment.COOL, 0),
-            'GOOD': counts.get(Judgment.GOOD, 0),
-            'MISS': counts.get(Judgment.MISS, 0)
-        }
+        # 计分器已按判定名称计数，返回副本以免Mod修改内部状态
+        return dict(self.game_engine.judgment.calculator.judgment_counts)
         
     def get_current_chart_info(self) -> Optional[Dict[str, Any]]:
         """获取当前谱面信息"""
-        if not self.game_engine.current_chart:
+        chart = self.game_engine.current_chart
+        if not chart:
             return None
             
-        meta = self.game_engine.current_chart.metadata
+        meta = chart.metadata
         return {
             'title': meta.title,
             'artist': meta.artist,
@@ -127,19 +116,13 @@ class GameAPI:
             'difficulty': meta.difficulty,
             'level': meta.level,
             'bpm': meta.bpm,
-            'duration': meta.duration if hasattr(meta, 'duration') else 0
+            'duration': meta.duration
         }
         
     def register_callback(self, event: str, callback) -> bool:
         """注册回调函数"""
         # 检查事件是否有效
-        valid_events = [
-            'on_note_hit', 'on_note_miss', 'on_combo_change',
-            'on_score_change', 'on_game_start', 'on_game_end',
-            'on_state_change'
-        ]
-        
-        if event not in valid_events:
+        if event not in _VALID_EVENTS:
             return False
             
         self.game_engine.register_callback(event, callback)
@@ -149,13 +132,3 @@ class GameAPI:
         """取消注册回调函数"""
         self.game_engine.unregister_callback(event, callback)
         return True
-        
-    def _check_permission(self, permission: Permission) -> bool:
-        """检查权限"""
-        # 从Mod管理器获取权限管理器
-        mod_manager = self.game_engine.mod_manager
-        if hasattr(mod_manager, 'permission_manager'):
-            return mod_manager.permission_manager.check_permission(
-                self.mod_instance.manifest.mod_id, permission
-            )
-        return False
\ No newline at end of file
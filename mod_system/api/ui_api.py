@@ -3,106 +3,108 @@
 UI控制API
 提供给Mod的UI控制接口
 """
+import importlib
+import logging
+from weakref import WeakSet
 from typing import Dict, List, Optional, Tuple, Any
 from kivy.uix.widget import Widget
 
 from mod_system.permission_system import Permission
+from mod_system.api.base_api import BaseAPI, requires, set_attributes
 
+logger = logging.getLogger(__name__)
 
-class UIApi:
+
+# Mod允许创建的组件：类路径 -> (模块, 类名)
+# kivy.uix.layout.* 为旧写法，保留兼容
+_WIDGET_PATHS: Dict[str, Tuple[str, str]] = {
+    'kivy.uix.label.Label': ('kivy.uix.label', 'Label'),
+    'kivy.uix.button.Button': ('kivy.uix.button', 'Button'),
+    'kivy.uix.image.Image': ('kivy.uix.image', 'Image'),
+    'kivy.uix.slider.Slider': ('kivy.uix.slider', 'Slider'),
+    'kivy.uix.boxlayout.BoxLayout': ('kivy.uix.boxlayout', 'BoxLayout'),
+    'kivy.uix.gridlayout.GridLayout': ('kivy.uix.gridlayout', 'GridLayout'),
+    'kivy.uix.floatlayout.FloatLayout': ('kivy.uix.floatlayout', 'FloatLayout'),
+    'kivy.uix.layout.BoxLayout': ('kivy.uix.boxlayout', 'BoxLayout'),
+    'kivy.uix.layout.GridLayout': ('kivy.uix.gridlayout', 'GridLayout'),
+    'kivy.uix.layout.FloatLayout': ('kivy.uix.floatlayout', 'FloatLayout'),
+}
+
+# 已导入的组件类（首次使用时填充）
+_WIDGET_REGISTRY: Dict[str, type] = {}
+
+
+def _resolve_widget(path: str) -> Optional[type]:
+    """根据类路径获取组件类，不在允许列表中时返回None"""
+    widget_cls = _WIDGET_REGISTRY.get(path)
+    if widget_cls is None:
+        target = _WIDGET_PATHS.get(path)
+        if target is None:
+            return None
+        module_name, class_name = target
+        widget_cls = getattr(importlib.import_module(module_name), class_name)
+        _WIDGET_REGISTRY[path] = widget_cls
+    return widget_cls
+
+
+class UIApi(BaseAPI):
     """UI控制API"""
     
     def __init__(self, mod_instance):
-        self.mod_instance = mod_instance
-        self.game_engine = mod_instance.game_engine
+        super().__init__(mod_instance)
         
-        # 存储Mod创建的UI元素
-        self.ui_elements: List[Widget] = []
+        # Mod创建的UI元素（弱引用，不阻止已丢弃的组件被回收）
+        self.ui_elements: WeakSet = WeakSet()
         
+    @requires(Permission.CREATE_UI_ELEMENT, fail=None)
     def create_widget(self, widget_class: str, **kwargs) -> Optional[Widget]:
         """创建UI组件"""
-        if not self._check_permission(Permission.CREATE_UI_ELEMENT):
-            return None
-            
         try:
-            # 动态导入Kivy组件
-            module_name, class_name = widget_class.rsplit('.', 1)
-            
-            if module_name == 'kivy.uix.label':
-                from kivy.uix.label import Label
-                widget = Label(**kwargs)
-            elif module_name == 'kivy.uix.button':
-                from kivy.uix.button import Button
-                widget = Button(**kwargs)
-            elif module_name == 'kivy.uix.image':
-                from kivy.uix.image import Image
-                widget = Image(**kwargs)
-            elif module_name == 'kivy.uix.slider':
-                from kivy.uix.slider import Slider
-                widget = Slider(**kwargs)
-            elif module_name == 'kivy.uix.layout':
-                if class_name == 'BoxLayout':
-                    from kivy.uix.boxlayout import BoxLayout
-                    widget = BoxLayout(**kwargs)
-                elif class_name == 'GridLayout':
-                    from kivy.uix.gridlayout import GridLayout
-                    widget = GridLayout(**kwargs)
-                elif class_name == 'FloatLayout':
-                    from kivy.uix.floatlayout import FloatLayout
-                    widget = FloatLayout(**kwargs)
-                else:
-                    return None
-            else:
+            widget_cls = _resolve_widget(widget_class)
+            if widget_cls is None:
                 return None
-                
+            widget = widget_cls(**kwargs)
+            
             # 存储引用
-            self.ui_elements.append(widget)
+            self.ui_elements.add(widget)
             return widget
             
-        except Exception as e:
-            print(f"创建UI组件失败: {e}")
+        except Exception:
+            logger.exception("创建UI组件失败: %s", widget_class)
             return None
             
+    @requires(Permission.CREATE_UI_ELEMENT)
     def add_widget(self, parent: Widget, widget: Widget) -> bool:
         """添加UI组件到父组件"""
-        if not self._check_permission(Permission.CREATE_UI_ELEMENT):
-            return False
-            
         try:
             parent.add_widget(widget)
             return True
-        except Exception as e:
-            print(f"添加UI组件失败: {e}")
+        except Exception:
+            logger.exception("添加UI组件失败")
             return False
             
+    @requires(Permission.REMOVE_UI_ELEMENT)
     def remove_widget(self, parent: Widget, widget: Widget) -> bool:
         """从父组件移除UI组件"""
-        if not self._check_permission(Permission.REMOVE_UI_ELEMENT):
-            return False
-            
         try:
             parent.remove_widget(widget)
             
             # 从存储中移除
-            if widget in self.ui_elements:
-                self.ui_elements.remove(widget)
+            self.ui_elements.discard(widget)
                 
             return True
-        except Exception as e:
-            print(f"移除UI组件失败: {e}")
+        except Exception:
+            logger.exception("移除UI组件失败")
             return False
             
+    @requires(Permission.MODIFY_UI)
     def modify_widget(self, widget: Widget, **kwargs) -> bool:
         """修改UI组件属性"""
-        if not self._check_permission(Permission.MODIFY_UI):
-            return False
-            
         try:
-            for key, value in kwargs.items():
-                setattr(widget, key, value)
+            set_attributes(widget, kwargs)
             return True
-        except Exception as e:
-            print(f"修改UI组件失败: {e}")
+        except Exception:
+            logger.exception("修改UI组件失败")
             return False
             
     def get_root_widget(self) -> Optional[Widget]:
@@ -112,22 +114,18 @@ class UIApi:
             return self.game_engine.current_screen
         return None
         
+    @requires(Permission.MODIFY_UI)
     def show_message(self, message: str, duration: float = 3.0) -> bool:
         """显示消息（临时）"""
-        if not self._check_permission(Permission.MODIFY_UI):
-            return False
-            
         # 这里应该实现一个消息显示系统
         # 暂时打印到控制台
         print(f"[Mod消息] {message}")
         return True
         
+    @requires(Permission.MODIFY_UI, fail=None)
     def show_dialog(self, title: str, message: str, 
                    buttons: List[str] = None) -> Optional[str]:
         """显示对话框"""
-        if not self._check_permission(Permission.MODIFY_UI):
-            return None
-            
         # 这里应该实现一个对话框系统
         # 暂时模拟返回第一个按钮
         print(f"[Mod对话框] {title}: {message}")
@@ -137,16 +135,7 @@ class UIApi:
         
     def clear_all_elements(self) -> None:
         """清除所有Mod创建的UI元素"""
-        for widget in self.ui_elements[:]:  # 使用副本遍历
+        for widget in list(self.ui_elements):  # 使用副本遍历
             if widget.parent:
                 widget.parent.remove_widget(widget)
-            self.ui_elements.remove(widget)
-            
-    def _check_permission(self, permission: Permission) -> bool:
-        """检查权限"""
-        mod_manager = self.game_engine.mod_manager
-        if hasattr(mod_manager, 'permission_manager'):
-            return mod_manager.permission_manager.check_permission(
-                self.mod_instance.manifest.mod_id, permission
-            )
-        return False
\ No newline at end of file
+        self.ui_elements.clear()
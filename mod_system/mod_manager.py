@@ -3,19 +3,28 @@
 Mod管理器
 负责加载、管理和运行Mod
 """
+import os
 import logging
 import importlib.util
 import sys
-import json
+import pickle
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional, Any, Type
+from types import CodeType
+from typing import Callable, Dict, List, Optional, Any, Tuple, Type
 from dataclasses import dataclass
 from enum import Enum
 
-from config import config, MOD_DIR
+from config import config, MOD_DIR, CACHE_DIR
+from utils.json_utils import json_loads
 
 logger = logging.getLogger(__name__)
 
+# Mod清单缓存（ModManifest结构变化时递增版本，使旧缓存失效）
+_MANIFEST_CACHE_FILE = CACHE_DIR / 'mod_manifests.pkl'
+_MANIFEST_CACHE_VERSION = 1
+
 
 class ModState(Enum):
     """Mod状态"""
@@ -35,7 +44,11 @@ class ModCategory(Enum):
     OTHERS  = "others"                # 其他分类
     
 
-@dataclass
+# 分类值 -> 分类（直接查表，绕过Enum的构造调用）
+_CATEGORY_BY_VALUE: Dict[str, ModCategory] = ModCategory._value2member_map_
+
+
+@dataclass(slots=True)
 class ModManifest:
     """Mod清单"""
     mod_id: str                    # 唯一ID
@@ -58,7 +71,7 @@ class ModManifest:
             version=data.get('version', '1.0.0'),
             author=data.get('author', 'Unknown'),
             description=data.get('description', ''),
-            category=ModCategory(data.get('category', 'gameplay')),
+            category=_CATEGORY_BY_VALUE[data.get('category', 'gameplay')],
             dependencies=data.get('dependencies', []),
             permissions=data.get('permissions', []),
             main_module=data.get('main_module', 'main.py'),
@@ -69,9 +82,15 @@ class ModManifest:
 class ModInstance:
     """Mod实例"""
     
-    def __init__(self, mod_path: Path, manifest: ModManifest):
+    __slots__ = (
+        'mod_path', 'manifest', 'game_engine', 'state', 'module', 'error', 'api_instances',
+        '_spec', '_code', '_code_mtime',
+    )
+    
+    def __init__(self, mod_path: Path, manifest: ModManifest, game_engine=None):
         self.mod_path = mod_path
         self.manifest = manifest
+        self.game_engine = game_engine  # 游戏引擎（API实例通过它访问游戏状态）
         self.state = ModState.DISABLED
         self.module = None
         self.error: Optional[str] = None
@@ -79,20 +98,38 @@ class ModInstance:
         # 加载的API实例
         self.api_instances: Dict[str, Any] = {}
         
+        # 主模块的模块规范、代码对象及编译时源文件的修改时间
+        self._spec = None
+        self._code: Optional[CodeType] = None
+        self._code_mtime: Optional[int] = None
+        
+    def compile_module(self) -> None:
+        """
+        读取并编译主模块，缓存模块规范和代码对象（不执行，可在工作线程中调用）
+        源文件未修改时直接复用上次的结果，反复启用/禁用Mod不必重新读取和编译
+        """
+        path = self.mod_path / self.manifest.main_module
+        mtime = os.stat(path).st_mtime_ns
+        if self._spec is not None and self._code_mtime == mtime:
+            return
+            
+        spec = importlib.util.spec_from_file_location(f"mod_{self.manifest.mod_id}", path)
+        if spec is None or spec.loader is None:
+            raise ImportError("无法创建模块规范")
+            
+        # 加载器无法单独给出代码对象时，load()中交给exec_module执行
+        get_code = getattr(spec.loader, 'get_code', None)
+        self._code = get_code(spec.name) if get_code is not None else None
+        self._spec = spec
+        self._code_mtime = mtime if self._code is not None else None
+        
     def load(self, api_classes: Dict[str, Type]) -> bool:
         """加载Mod"""
         try:
-            # 构建模块规范
-            spec = importlib.util.spec_from_file_location(
-                f"mod_{self.manifest.mod_id}",
-                self.mod_path / self.manifest.main_module
-            )
+            # 构建模块规范并编译（已编译且源文件未修改时直接复用）
+            self.compile_module()
+            spec = self._spec
             
-            if spec is None or spec.loader is None:
-                self.error = "无法创建模块规范"
-                self.state = ModState.ERROR
-                return False
-                
             # 创建模块
             module = importlib.util.module_from_spec(spec)
             sys.modules[spec.name] = module
@@ -104,7 +141,10 @@ class ModInstance:
                 setattr(module, api_name, api_instance)
                 
             # 执行模块
-            spec.loader.exec_module(module)
+            if self._code is not None:
+                exec(self._code, module.__dict__)
+            else:
+                spec.loader.exec_module(module)
             self.module = module
             
             # 调用初始化函数（如果存在）
@@ -126,7 +166,10 @@ class ModInstance:
             if self.module and hasattr(self.module, 'cleanup'):
                 self.module.cleanup()
                 
-            # 清理API实例
+            # 清理API实例（先写出尚未保存的数据）
+            for api_instance in self.api_instances.values():
+                if hasattr(api_instance, 'flush'):
+                    api_instance.flush()
             self.api_instances.clear()
             
             # 从sys.modules中移除
@@ -142,11 +185,11 @@ class ModInstance:
             self.error = str(e)
             return False
             
-    def enable(self) -> bool:
+    def enable(self, api_classes: Dict[str, Type]) -> bool:
         """启用Mod"""
         if self.state == ModState.DISABLED:
             # 需要先加载
-            return self.load()
+            return self.load(api_classes)
         return self.state == ModState.LOADED or self.state == ModState.ENABLED
         
     def disable(self) -> bool:
@@ -175,6 +218,9 @@ class ModManager:
         self.mods: Dict[str, ModInstance] = {}
         self.load_order: List[str] = []
         self.api_classes: Dict[str, Type] = {}
+        self._load_order_dirty = True  # Mod启用状态变化后需要重新解析加载顺序
+        # 钩子名 -> [(Mod ID, 钩子函数)]，按加载顺序排列；Mod加载/卸载后清空
+        self._hook_table: Dict[str, List[Tuple[str, Callable]]] = {}
         
         logger.debug(f"Mod目录: {MOD_DIR}")
         self._scan_mods()
@@ -188,35 +234,76 @@ class ModManager:
             MOD_DIR.mkdir(parents=True, exist_ok=True)
             return
             
-        for mod_dir in MOD_DIR.iterdir():
-            if not mod_dir.is_dir():
-                continue
-                
-            manifest_file = mod_dir / 'manifest.json'
-            if not manifest_file.exists():
-                logger.debug(f"跳过无清单文件的目录: {mod_dir.name}")
-                continue
-                
-            try:
-                with open(manifest_file, 'r', encoding='utf-8') as f:
-                    manifest_data = json.load(f)
+        enabled_mods = set(config.get('mods.enabled_mods', []))
+        
+        # 清单缓存：清单文件路径 -> (修改时间, 大小, 清单)，未修改的清单不必重新解析
+        cached_manifests = self._load_manifest_cache()
+        manifests: Dict[str, Tuple[int, int, ModManifest]] = {}
+        
+        # scandir的目录项自带类型信息，省去逐个stat
+        with os.scandir(MOD_DIR) as entries:
+            for entry in entries:
+                if not entry.is_dir(follow_symlinks=False):
+                    continue
                     
-                manifest = ModManifest.from_dict(manifest_data)
-                mod_instance = ModInstance(mod_dir, manifest)
-                
-                enabled_mods = config.get('mods.enabled_mods', [])
-                if manifest.mod_id in enabled_mods:
-                    mod_instance.state = ModState.ENABLED
-                    logger.debug(f"Mod已启用: {manifest.name}")
-                else:
-                    logger.debug(f"Mod已禁用: {manifest.name}")
+                manifest_file = os.path.join(entry.path, 'manifest.json')
+                try:
+                    stat = os.stat(manifest_file)
+                except FileNotFoundError:
+                    logger.debug(f"跳过无清单文件的目录: {entry.name}")
+                    continue
                     
-                self.mods[manifest.mod_id] = mod_instance
-                logger.info(f"加载Mod清单: {manifest.name} v{manifest.version}")
-                
-            except Exception as e:
-                logger.error(f"加载Mod清单失败 {mod_dir}: {e}")
-                
+                try:
+                    cached = cached_manifests.get(manifest_file)
+                    if cached is not None and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+                        manifest = cached[2]
+                    else:
+                        with open(manifest_file, 'rb') as f:
+                            manifest = ModManifest.from_dict(json_loads(f.read()))
+                    manifests[manifest_file] = (stat.st_mtime_ns, stat.st_size, manifest)
+                    
+                    mod_instance = ModInstance(Path(entry.path), manifest, self.game_engine)
+                    
+                    if manifest.mod_id in enabled_mods:
+                        mod_instance.state = ModState.ENABLED
+                        logger.debug(f"Mod已启用: {manifest.name}")
+                    else:
+                        logger.debug(f"Mod已禁用: {manifest.name}")
+                        
+                    self.mods[manifest.mod_id] = mod_instance
+                    logger.info(f"加载Mod清单: {manifest.name} v{manifest.version}")
+                    
+                except Exception as e:
+                    logger.error(f"加载Mod清单失败 {entry.path}: {e}")
+                    
+        if manifests != cached_manifests:
+            self._save_manifest_cache(manifests)
+            
+        self._load_order_dirty = True
+        
+    @staticmethod
+    def _load_manifest_cache() -> Dict[str, Tuple[int, int, ModManifest]]:
+        """读取Mod清单缓存，缓存不存在或版本不符时返回空字典"""
+        try:
+            with open(_MANIFEST_CACHE_FILE, 'rb') as f:
+                version, manifests = pickle.load(f)
+            if version == _MANIFEST_CACHE_VERSION:
+                return manifests
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.debug("Mod清单缓存读取失败: %s", e)
+        return {}
+        
+    @staticmethod
+    def _save_manifest_cache(manifests: Dict[str, Tuple[int, int, ModManifest]]) -> None:
+        """写入Mod清单缓存"""
+        try:
+            with open(_MANIFEST_CACHE_FILE, 'wb') as f:
+                pickle.dump((_MANIFEST_CACHE_VERSION, manifests), f, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            logger.debug("Mod清单缓存写入失败: %s", e)
+            
     def register_api(self, api_name: str, api_class: Type) -> None:
         """注册API类"""
         self.api_classes[api_name] = api_class
@@ -224,35 +311,63 @@ class ModManager:
     def load_all_mods(self) -> None:
         """加载所有启用的Mod"""
         logger.info("开始加载Mod...")
-        self.load_order = config.get('mods.mod_load_order', [])
+        configured_order = config.get('mods.mod_load_order', [])
         
-        if not self.load_order:
+        if configured_order:
+            self.load_order = configured_order
+            self._load_order_dirty = False
+        else:
             logger.debug("使用依赖关系排序Mod")
-            self.load_order = self._resolve_dependencies()
+            self._get_load_order()
             
+        pending = [
+            self.mods[mod_id] for mod_id in self.load_order
+            if mod_id in self.mods and self.mods[mod_id].state == ModState.ENABLED
+        ]
+        self._compile_modules(pending)
+        
+        # 模块按加载顺序在主线程中逐个执行（依赖先于被依赖者，且Mod初始化可能操作UI）
         loaded_count = 0
-        for mod_id in self.load_order:
-            if mod_id in self.mods:
-                mod = self.mods[mod_id]
-                if mod.state == ModState.ENABLED:
-                    logger.info(f"加载Mod: {mod.manifest.name}")
-                    if not mod.load(self.api_classes):
-                        logger.error(f"Mod加载失败: {mod.manifest.name} ({mod.error})")
-                    else:
-                        loaded_count += 1
-                        logger.debug(f"Mod加载成功: {mod.manifest.name}")
-                        
+        for mod in pending:
+            logger.info(f"加载Mod: {mod.manifest.name}")
+            if not mod.load(self.api_classes):
+                logger.error(f"Mod加载失败: {mod.manifest.name} ({mod.error})")
+            else:
+                loaded_count += 1
+                logger.debug(f"Mod加载成功: {mod.manifest.name}")
+                
+
+        self._hook_table.clear()
         logger.info(f"Mod加载完成: {loaded_count}/{len(self.load_order)}")
         
+    def _compile_modules(self, mods: List[ModInstance]) -> None:
+        """用线程池并行读取并编译各Mod的主模块（读文件时会释放GIL）"""
+        def compile_one(mod: ModInstance) -> None:
+            try:
+                mod.compile_module()
+            except Exception:
+                # load()中会再次尝试并记录错误
+                pass
+                
+        if len(mods) <= 1:
+            for mod in mods:
+                compile_one(mod)
+            return
+            
+        with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1, len(mods))) as pool:
+            list(pool.map(compile_one, mods))
+            
     def unload_all_mods(self) -> None:
         """卸载所有Mod"""
         # 按相反顺序卸载
-        for mod_id in reversed(self.load_order):
+        for mod_id in reversed(self._get_load_order()):
             if mod_id in self.mods:
                 mod = self.mods[mod_id]
                 if mod.state == ModState.LOADED:
                     mod.unload()
                     
+        self._hook_table.clear()
+        
     def enable_mod(self, mod_id: str) -> bool:
         """启用Mod"""
         if mod_id not in self.mods:
@@ -267,7 +382,7 @@ class ModManager:
                 return False
                 
         # 启用Mod
-        success = mod.enable()
+        success = mod.enable(self.api_classes)
         if success:
             # 更新配置
             enabled_mods = config.get('mods.enabled_mods', [])
@@ -275,8 +390,9 @@ class ModManager:
                 enabled_mods.append(mod_id)
                 config.set('mods.enabled_mods', enabled_mods)
                 
-            # 重新计算加载顺序
-            self.load_order = self._resolve_dependencies()
+            # 加载顺序在下次使用时重新计算
+            self._load_order_dirty = True
+            self._hook_table.clear()
             
         return success
         
@@ -295,52 +411,81 @@ class ModManager:
                 enabled_mods.remove(mod_id)
                 config.set('mods.enabled_mods', enabled_mods)
                 
+            # 加载顺序保持不变（配置的mod_load_order仍然有效），未加载的Mod在收集钩子时跳过
+            self._hook_table.clear()
+            
         return success
         
     def call_hooks(self, hook_name: str, *args, **kwargs) -> List[Any]:
         """调用所有Mod的钩子函数"""
+        hooks = self._hook_table.get(hook_name)
+        if hooks is None:
+            hooks = self._hook_table[hook_name] = self._collect_hooks(hook_name)
+            
         results = []
-        
-        for mod_id in self.load_order:
-            if mod_id in self.mods:
-                mod = self.mods[mod_id]
-                if mod.state == ModState.LOADED:
-                    result = mod.call_hook(hook_name, *args, **kwargs)
-                    if result is not None:
-                        results.append(result)
-                        
+        for mod_id, func in hooks:
+            try:
+                result = func(*args, **kwargs)
+            except Exception:
+                logger.exception("Mod %s 钩子 %s 执行失败", mod_id, hook_name)
+                continue
+            if result is not None:
+                results.append(result)
+                
         return results
         
+    def _collect_hooks(self, hook_name: str) -> List[Tuple[str, Callable]]:
+        """按加载顺序收集已加载Mod中名为hook_name的钩子函数"""
+        hooks = []
+        for mod_id in self._get_load_order():
+            mod = self.mods.get(mod_id)
+            if mod is None or mod.state != ModState.LOADED or mod.module is None:
+                continue
+            # 同名的非函数属性（如 on_update = None）不是钩子
+            func = getattr(mod.module, hook_name, None)
+            if callable(func):
+                hooks.append((mod_id, func))
+        return hooks
+        
+    def _get_load_order(self) -> List[str]:
+        """获取加载顺序（启用状态变化后才重新解析依赖）"""
+        if self._load_order_dirty:
+            self.load_order = self._resolve_dependencies()
+            self._load_order_dirty = False
+        return self.load_order
+        
     def _resolve_dependencies(self) -> List[str]:
         """解析依赖关系，返回加载顺序"""
         # 构建依赖图
         graph = {}
         for mod_id, mod in self.mods.items():
-            if mod.state != ModState.ENABLED:
+            if mod.state != ModState.ENABLED and mod.state != ModState.LOADED:
                 continue
             graph[mod_id] = set(mod.manifest.dependencies)
             
-        # 拓扑排序
-        visited = set()
-        temp_visited = set()
+        # 拓扑排序（Kahn算法）：入度为依赖数，被依赖者 -> 依赖它的Mod
+        indegree = {mod_id: 0 for mod_id in graph}
+        dependents: Dict[str, List[str]] = {mod_id: [] for mod_id in graph}
+        for mod_id, deps in graph.items():
+            for dep in deps:
+                if dep in graph:  # 只考虑启用的Mod
+                    indegree[mod_id] += 1
+                    dependents[dep].append(mod_id)
+                    
+        queue = deque(mod_id for mod_id, count in indegree.items() if count == 0)
         order = []
-        
-        def visit(node):
-            if node in temp_visited:
-                raise Exception(f"循环依赖: {node}")
-            if node not in visited:
-                temp_visited.add(node)
-                for dep in graph.get(node, []):
-                    if dep in graph:  # 只考虑启用的Mod
-                        visit(dep)
-                temp_visited.remove(node)
-                visited.add(node)
-                order.append(node)
-                
-        for node in list(graph.keys()):
-            if node not in visited:
-                visit(node)
-                
+        while queue:
+            node = queue.popleft()
+            order.append(node)
+            for dependent in dependents[node]:
+                indegree[dependent] -= 1
+                if indegree[dependent] == 0:
+                    queue.append(dependent)
+                    
+        if len(order) < len(graph):
+            cycle = [mod_id for mod_id, count in indegree.items() if count > 0]
+            raise Exception(f"循环依赖: {', '.join(cycle)}")
+            
         return order
         
     def get_mod_info(self, mod_id: str) -> Optional[Dict[str, Any]]:
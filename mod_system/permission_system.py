@@ -5,9 +5,10 @@
 """
 from typing import List, Dict, Set, Optional
 from enum import Enum
-import json
+import weakref
 
 from config import config, DATA_DIR
+from utils.json_utils import json_loads, json_dumps
 
 
 class Permission(Enum):
@@ -46,11 +47,33 @@ class Permission(Enum):
     MODIFY_HEALTH = "modify_health"         # 修改血量（Mod自定义血量系统）
     MODIFY_SCORE = "modify_score"           # 修改分数
     MODIFY_COMBO = "modify_combo"           # 修改连击
+    
+    def __init__(self, value):
+        # 每个权限在位掩码中占一位（按定义顺序）
+        self.bit = 1 << len(self.__class__.__members__)
+
+
+# 权限值 -> 权限（直接查表，绕过Enum的构造调用）
+_PERMISSION_BY_VALUE: Dict[str, Permission] = Permission._value2member_map_
+
+# 危险权限
+_DANGEROUS_PERMISSIONS = frozenset({
+    Permission.WRITE_FILES,
+    Permission.ACCESS_USER_DATA,
+    Permission.ACCESS_INTERNET,
+    Permission.MODIFY_SETTINGS,
+    Permission.RUN_BACKGROUND_TASKS,
+    Permission.MODIFY_HEALTH,
+    Permission.MODIFY_SCORE,
+    Permission.MODIFY_COMBO,
+})
 
 
 class PermissionRequest:
     """权限请求"""
     
+    __slots__ = ('mod_id', 'permissions', 'reason', 'granted')
+    
     def __init__(self, mod_id: str, permissions: List[Permission], reason: str = ""):
         self.mod_id = mod_id
         self.permissions = permissions
@@ -67,8 +90,30 @@ class PermissionManager:
     def __init__(self):
         self.permissions_file = DATA_DIR / 'mod_permissions.json'
         self.granted_permissions: Dict[str, Set[Permission]] = {}
+        self._granted_mask: Dict[str, int] = {}  # Mod ID -> 已授权权限的位掩码
+        self._listeners = weakref.WeakSet()  # 缓存了权限位掩码的API实例
         self._load_permissions()
         
+    def add_listener(self, listener) -> None:
+        """注册权限变化监听者（需实现 invalidate_permissions 方法）"""
+        self._listeners.add(listener)
+        
+    def _on_change(self) -> None:
+        """权限变化时重建位掩码，并通知所有监听者重新获取权限"""
+        self._rebuild_masks()
+        for listener in list(self._listeners):
+            listener.invalidate_permissions()
+            
+    def _rebuild_masks(self) -> None:
+        """根据granted_permissions重新计算各Mod的权限位掩码"""
+        masks = {}
+        for mod_id, perms in self.granted_permissions.items():
+            mask = 0
+            for perm in perms:
+                mask |= perm.bit
+            masks[mod_id] = mask
+        self._granted_mask = masks
+        
     def _load_permissions(self) -> None:
         """加载已授权的权限"""
         if not self.permissions_file.exists():
@@ -76,17 +121,18 @@ class PermissionManager:
             return
             
         try:
-            with open(self.permissions_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                
+            data = json_loads(self.permissions_file.read_bytes())
+            
             for mod_id, perms in data.items():
                 self.granted_permissions[mod_id] = {
-                    Permission(perm) for perm in perms
+                    _PERMISSION_BY_VALUE[perm] for perm in perms
                 }
         except Exception as e:
             print(f"加载权限文件失败: {e}")
             self.granted_permissions = {}
             
+        self._rebuild_masks()
+            
     def _save_permissions(self) -> None:
         """保存权限到文件"""
         try:
@@ -94,18 +140,14 @@ class PermissionManager:
             for mod_id, perms in self.granted_permissions.items():
                 data[mod_id] = [perm.value for perm in perms]
                 
-            with open(self.permissions_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            self.permissions_file.write_bytes(json_dumps(data))
         except Exception as e:
             print(f"保存权限文件失败: {e}")
             
     def check_permission(self, mod_id: str, permission: Permission) -> bool:
         """检查Mod是否拥有某个权限"""
-        # 如果Mod没有请求过权限，自动拒绝
-        if mod_id not in self.granted_permissions:
-            return False
-            
-        return permission in self.granted_permissions[mod_id]
+        # 如果Mod没有请求过权限，掩码为0，自动拒绝
+        return self._granted_mask.get(mod_id, 0) & permission.bit != 0
         
     def request_permissions(self, mod_id: str, permissions: List[Permission]) -> bool:
         """
@@ -146,6 +188,7 @@ class PermissionManager:
                 self.granted_permissions[mod_id].add(perm)
                 
             self._save_permissions()
+            self._on_change()
             return True
         else:
             return False
@@ -161,13 +204,19 @@ class PermissionManager:
                 del self.granted_permissions[mod_id]
                 
             self._save_permissions()
+            self._on_change()
             
     def revoke_all_permissions(self, mod_id: str) -> None:
         """撤销Mod的所有权限"""
         if mod_id in self.granted_permissions:
             del self.granted_permissions[mod_id]
             self._save_permissions()
+            self._on_change()
             
+    def get_mask(self, mod_id: str) -> int:
+        """获取Mod已授权权限的位掩码（Permission.bit 按位或）"""
+        return self._granted_mask.get(mod_id, 0)
+        
     def get_mod_permissions(self, mod_id: str) -> List[Permission]:
         """获取Mod的所有权限"""
         if mod_id in self.granted_permissions:
@@ -176,20 +225,8 @@ class PermissionManager:
         
     def _get_dangerous_permissions(self, permissions: List[Permission]) -> List[Permission]:
         """获取危险权限列表"""
-        dangerous = []
-        for perm in permissions:
-            if perm in [
-                Permission.WRITE_FILES,
-                Permission.ACCESS_USER_DATA,
-                Permission.ACCESS_INTERNET,
-                Permission.MODIFY_SETTINGS,
-                Permission.RUN_BACKGROUND_TASKS,
-                Permission.MODIFY_HEALTH,
-                Permission.MODIFY_SCORE,
-                Permission.MODIFY_COMBO
-            ]:
-                dangerous.append(perm)
-        return dangerous
+        # 保持请求中的顺序
+        return [perm for perm in permissions if perm in _DANGEROUS_PERMISSIONS]
         
     def _simulate_user_consent(self, mod_id: str, permissions: List[Permission]) -> bool:
         """模拟用户同意（临时方案）"""
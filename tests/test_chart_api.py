@@ -0,0 +1,91 @@
+# mystia_rhythm/tests/test_chart_api.py
+"""
+ChartAPI 音符编辑测试：判定状态与谱面音符保持对齐
+"""
+import unittest
+from types import SimpleNamespace
+
+from core.chart_parser import Chart, ChartMetadata, Note, TimeEvent
+from core.judgment_system import JudgmentSystem
+from mod_system.api.chart_api import ChartAPI
+from mod_system.permission_system import Permission
+
+
+class _Engine:
+    """只提供ChartAPI用到的部分的游戏引擎"""
+    
+    def __init__(self, chart: Chart):
+        self.current_chart = chart
+        self.judgment = JudgmentSystem()
+        self.judgment.reset(len(chart.notes))
+        self.refresh_count = 0
+        
+    def refresh_note_arrays(self):
+        self.refresh_count += 1
+
+
+class ChartAPINoteEditTest(unittest.TestCase):
+    """add_note / remove_note / modify_note"""
+    
+    def setUp(self):
+        notes = [Note(float(beat), beat % 4) for beat in range(4)]
+        self.chart = Chart(ChartMetadata(bpm=120.0), notes, [TimeEvent(beat=0.0, bpm=120.0)], [])
+        self.engine = _Engine(self.chart)
+        mod_instance = SimpleNamespace(game_engine=self.engine, manifest=SimpleNamespace(mod_id='test_mod'))
+        self.api = ChartAPI(mod_instance)
+        self.api._perm_mask = Permission.MODIFY_CHART.bit | Permission.ACCESS_CHART_DATA.bit
+        
+        # 第1个音符（拍1）已判定
+        self.judged_note = notes[1]
+        self.result = self.engine.judgment.judge_note(None, 0.0, 0.0, lane=1)
+        self.engine.judgment.mark_judged(1, self.result)
+        
+    def assertAligned(self):
+        """判定数组与音符一一对应，已判定的仍是原来那个音符，且音符按拍数有序"""
+        judgment = self.engine.judgment
+        notes = self.chart.notes
+        self.assertEqual(len(judgment.judged_mask), len(notes))
+        self.assertEqual(len(judgment.judgment_results), len(notes))
+        self.assertEqual(judgment.judged_mask.tolist(), [note is self.judged_note for note in notes])
+        self.assertIs(judgment.judgment_results[notes.index(self.judged_note)], self.result)
+        self.assertEqual(judgment.remaining_notes, len(notes) - 1)
+        self.assertEqual([note.beat for note in notes], sorted(note.beat for note in notes))
+        
+    def test_add_note_keeps_state_aligned(self):
+        self.assertTrue(self.api.add_note(self.api.create_note([0, 1, 2], 3)))
+        self.assertEqual(self.chart.notes[1].beat, 0.5)
+        self.assertEqual(self.chart.notes[1].time, 0.25)
+        self.assertAligned()
+        self.assertEqual(self.engine.refresh_count, 1)
+        
+    def test_remove_note_keeps_state_aligned(self):
+        self.assertTrue(self.api.remove_note(0))
+        self.assertAligned()
+        self.assertTrue(self.api.remove_note(2))
+        self.assertAligned()
+        self.assertFalse(self.api.remove_note(5))
+        self.assertEqual(self.engine.refresh_count, 2)
+        
+    def test_modify_beat_moves_note_with_its_state(self):
+        self.assertTrue(self.api.modify_note(1, beat=[5, 1, 4], endbeat=[6, 0, 1]))
+        self.assertIs(self.chart.notes[-1], self.judged_note)
+        self.assertEqual(self.judged_note.beat, 5.25)
+        self.assertEqual(self.judged_note.endbeat, 6.0)
+        self.assertEqual(self.judged_note.duration, 0.375)
+        self.assertAligned()
+        
+    def test_modify_without_beat_keeps_position(self):
+        self.assertTrue(self.api.modify_note(2, column=0))
+        self.assertEqual(self.chart.notes[2].column, 0)
+        self.assertAligned()
+        
+    def test_edit_without_permission_is_rejected(self):
+        self.api._perm_mask = 0
+        self.assertFalse(self.api.add_note(self.api.create_note(1.5, 0)))
+        self.assertFalse(self.api.remove_note(0))
+        self.assertAligned()
+        self.assertEqual(self.engine.refresh_count, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+# mystia_rhythm/tests/test_chart_parser.py
+"""
+.mcz 谱面流式读取测试
+"""
+import json
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+from unittest import mock
+
+from core import chart_parser
+from core.chart_parser import ChartParser
+
+# note 放在 meta/time 之前，并带有扩展字段，检查单次遍历不依赖字段顺序
+CHART = {
+    'note': [
+        {'beat': [0, 0, 1], 'sound': 'song.ogg', 'type': 1, 'vol': 80},
+        {'beat': [1, 0, 1], 'column': 0},
+        {'beat': [1, 1, 2], 'column': 2, 'endbeat': [3, 1, 4], 'type': 2},
+        {'beat': [2, 1, 3], 'column': 3, 'vol': 0.5},
+    ],
+    'meta': {'version': 'Hard', 'song': {'title': 'T', 'artist': 'A'}, 'mode_ext': {'column': 4}},
+    'time': [{'beat': [0, 0, 1], 'bpm': 150.0}, {'beat': [2, 0, 1], 'bpm': 75.5}],
+    'effect': [{'beat': [1, 0, 1], 'type': 'flash', 'params': {'n': [1, 2]}}],
+    'extra': {'test': {'divide': 4}},
+}
+
+
+class LoadMczTest(unittest.TestCase):
+    """_load_mcz 流式读取与整体读取结果一致"""
+    
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.mcz_path = Path(self._tmp.name) / 'chart.mcz'
+        with zipfile.ZipFile(self.mcz_path, 'w') as zf:
+            zf.writestr('0/chart.mc', json.dumps(CHART))
+        (Path(self._tmp.name) / 'song.ogg').write_bytes(b'')
+        
+    def _load(self, use_ijson: bool):
+        with mock.patch.object(chart_parser, 'IJSON_AVAILABLE', use_ijson):
+            chart = ChartParser._load_mcz(self.mcz_path)
+        self.assertIsNotNone(chart)
+        return chart
+        
+    @unittest.skipUnless(chart_parser.IJSON_AVAILABLE, "需要ijson")
+    def test_stream_matches_full_read(self):
+        streamed = self._load(True)
+        full = self._load(False)
+        
+        self.assertEqual(streamed.notes, full.notes)
+        self.assertEqual(streamed.time_events, full.time_events)
+        self.assertEqual(streamed.effect_events, full.effect_events)
+        self.assertEqual(streamed.custom_data, full.custom_data)
+        self.assertEqual(streamed.metadata, full.metadata)
+        
+    def test_notes_and_audio(self):
+        chart = self._load(chart_parser.IJSON_AVAILABLE)
+        self.assertEqual([n.column for n in chart.notes], [0, 2, 3])
+        self.assertEqual(chart.metadata.audio_path, Path(self._tmp.name) / 'song.ogg')
+        self.assertEqual(chart.custom_data, {'extra': {'test': {'divide': 4}}})
+
+
+if __name__ == '__main__':
+    unittest.main()
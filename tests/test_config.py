@@ -0,0 +1,67 @@
+# mystia_rhythm/tests/test_config.py
+"""
+Config 延迟保存与原子写入测试
+"""
+import logging
+import tempfile
+import unittest
+from pathlib import Path
+
+from config import Config
+from utils.json_utils import json_loads
+
+
+class ConfigSaveTest(unittest.TestCase):
+    """Config.set / flush / save"""
+    
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.cfg = Config()
+        self.cfg.config_path = Path(self._tmp.name) / 'config.json'
+        # 测试中不让定时器自动触发，由flush()显式写盘
+        self.cfg.SAVE_DELAY = 60.0
+        self.addCleanup(self._cancel_timer)
+        
+    def _cancel_timer(self):
+        timer = self.cfg._save_timer
+        if timer:
+            timer.cancel()
+        self.cfg._dirty = False
+        
+    def test_set_is_debounced_until_flush(self):
+        self.cfg.set('gameplay.scroll_speed', 3.0)
+        self.cfg.set('gameplay.note_size', 1.5)
+        self.assertFalse(self.cfg.config_path.exists())
+        
+        self.cfg.flush()
+        saved = json_loads(self.cfg.config_path.read_bytes())
+        self.assertEqual(saved['gameplay']['scroll_speed'], 3.0)
+        self.assertEqual(saved['gameplay']['note_size'], 1.5)
+        self.assertIsNone(self.cfg._save_timer)
+        
+    def test_unchanged_value_does_not_schedule_save(self):
+        self.cfg.set('gameplay.scroll_speed', self.cfg.get('gameplay.scroll_speed'))
+        self.assertFalse(self.cfg._dirty)
+        self.assertIsNone(self.cfg._save_timer)
+        
+    def test_save_leaves_no_temp_file(self):
+        self.cfg.set('audio.volume_master', 0.5)
+        self.cfg.flush()
+        self.assertEqual([p.name for p in Path(self._tmp.name).iterdir()], ['config.json'])
+        
+    def test_unserializable_value_keeps_previous_file(self):
+        self.cfg.set('audio.volume_master', 0.5)
+        self.cfg.flush()
+        before = self.cfg.config_path.read_bytes()
+        
+        self.cfg.set('audio.volume_master', object())
+        with self.assertLogs('config', level=logging.ERROR):
+            self.cfg.flush()
+            
+        self.assertEqual(self.cfg.config_path.read_bytes(), before)
+        self.assertEqual([p.name for p in Path(self._tmp.name).iterdir()], ['config.json'])
+
+
+if __name__ == '__main__':
+    unittest.main()
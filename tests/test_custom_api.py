@@ -0,0 +1,77 @@
+# mystia_rhythm/tests/test_custom_api.py
+"""
+CustomAPI 缓存与延迟写盘测试
+"""
+import logging
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+from mod_system.api import custom_api
+from mod_system.api.custom_api import CustomAPI
+from mod_system.permission_system import Permission
+from utils.json_utils import json_loads
+
+
+class CustomAPITest(unittest.TestCase):
+    """save_data / load_data / delete_data / flush"""
+    
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        patcher = mock.patch.object(custom_api, 'SAVES_DIR', Path(self._tmp.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        
+        mod_instance = SimpleNamespace(game_engine=None, manifest=SimpleNamespace(mod_id='test_mod'))
+        self.api = CustomAPI(mod_instance)
+        self.api._perm_mask = Permission.READ_FILES.bit | Permission.WRITE_FILES.bit
+        # 测试中不让定时器自动触发，由flush()显式写盘
+        self.api.FLUSH_DELAY = 60.0
+        self.addCleanup(self.api.flush)
+        self.data_file = self.api.mod_data_dir / 'progress.json'
+        
+    def test_save_is_debounced_until_flush(self):
+        self.assertTrue(self.api.save_data('progress', {'level': 1}))
+        self.assertTrue(self.api.save_data('progress', {'level': 2}))
+        self.assertFalse(self.data_file.exists())
+        
+        self.api.flush()
+        self.assertEqual(json_loads(self.data_file.read_bytes()), {'level': 2})
+        
+    def test_cache_is_isolated_from_caller_objects(self):
+        data = {'items': [1, 2]}
+        self.api.save_data('progress', data)
+        data['items'].append(3)
+        
+        loaded = self.api.load_data('progress')
+        self.assertEqual(loaded, {'items': [1, 2]})
+        loaded['items'].clear()
+        self.assertEqual(self.api.load_data('progress'), {'items': [1, 2]})
+        
+    def test_unserializable_data_is_rejected(self):
+        with self.assertLogs(custom_api.logger, level=logging.ERROR):
+            self.assertFalse(self.api.save_data('progress', {'bad': object()}))
+        self.assertIsNone(self.api.load_data('progress'))
+        self.assertNotIn('progress', self.api.list_data_keys())
+        
+    def test_delete_is_not_undone_by_pending_flush(self):
+        self.api.save_data('progress', {'level': 1})
+        self.api.flush()
+        self.api.save_data('progress', {'level': 2})
+        
+        self.assertTrue(self.api.delete_data('progress'))
+        self.api.flush()
+        self.assertFalse(self.data_file.exists())
+        self.assertEqual(self.api.load_data('progress', 'default'), 'default')
+        self.assertEqual(self.api.list_data_keys(), [])
+        
+    def test_load_reads_existing_file(self):
+        self.data_file.write_bytes(b'{"level": 5}')
+        self.assertEqual(self.api.load_data('progress'), {'level': 5})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+# mystia_rhythm/tests/test_judgment_kernels.py
+"""
+判定内核测试（numba可用时同时对照未编译的Python实现）
+"""
+import unittest
+
+import numpy as np
+
+from core.judgment_kernels import sweep_misses, find_hit, NUMBA_AVAILABLE
+
+
+def _variants(kernel):
+    """内核本身，以及numba可用时未编译的原始函数"""
+    yield kernel
+    if NUMBA_AVAILABLE:
+        yield kernel.py_func
+
+
+class SweepMissesTest(unittest.TestCase):
+    """sweep_misses"""
+    
+    def setUp(self):
+        self.note_times = np.array([0.5, 1.0, 1.0, 1.5, 3.0])
+        self.judged = np.array([False, True, False, False, False])
+        
+    def test_advances_cursor_and_skips_judged(self):
+        for kernel in _variants(sweep_misses):
+            cursor, misses = kernel(self.note_times, self.judged, 0, 1.7, 0.12)
+            self.assertEqual(cursor, 4)
+            self.assertEqual(misses.tolist(), [0, 2, 3])
+            
+    def test_starts_from_cursor(self):
+        for kernel in _variants(sweep_misses):
+            cursor, misses = kernel(self.note_times, self.judged, 3, 10.0, 0.12)
+            self.assertEqual(cursor, 5)
+            self.assertEqual(misses.tolist(), [3, 4])
+            
+    def test_note_inside_window_is_not_missed(self):
+        for kernel in _variants(sweep_misses):
+            cursor, misses = kernel(self.note_times, self.judged, 0, 0.62, 0.12)
+            self.assertEqual(cursor, 0)
+            self.assertEqual(len(misses), 0)
+            
+    def test_empty_chart(self):
+        for kernel in _variants(sweep_misses):
+            cursor, misses = kernel(np.zeros(0), np.zeros(0, dtype=np.bool_), 0, 5.0, 0.12)
+            self.assertEqual(cursor, 0)
+            self.assertEqual(len(misses), 0)
+
+
+class FindHitTest(unittest.TestCase):
+    """find_hit"""
+    
+    def setUp(self):
+        # 单个轨道的音符时间及其在谱面中的索引
+        self.lane_times = np.array([1.0, 1.05, 1.1, 2.0])
+        self.lane_indices = np.array([2, 4, 7, 9], dtype=np.int64)
+        self.judged = np.zeros(10, dtype=np.bool_)
+        
+    def test_returns_earliest_unjudged_in_window(self):
+        for kernel in _variants(find_hit):
+            self.assertEqual(kernel(self.lane_times, self.lane_indices, self.judged, 1.08, 0.12), 2)
+            
+    def test_skips_judged_notes(self):
+        self.judged[2] = True
+        self.judged[4] = True
+        for kernel in _variants(find_hit):
+            self.assertEqual(kernel(self.lane_times, self.lane_indices, self.judged, 1.08, 0.12), 7)
+            
+    def test_returns_minus_one_outside_window(self):
+        for kernel in _variants(find_hit):
+            self.assertEqual(kernel(self.lane_times, self.lane_indices, self.judged, 1.5, 0.12), -1)
+            self.assertEqual(kernel(self.lane_times, self.lane_indices, self.judged, 0.5, 0.12), -1)
+            
+    def test_empty_lane(self):
+        for kernel in _variants(find_hit):
+            self.assertEqual(
+                kernel(np.zeros(0), np.zeros(0, dtype=np.int64), self.judged, 1.0, 0.12), -1
+            )
+
+
+if __name__ == '__main__':
+    unittest.main()
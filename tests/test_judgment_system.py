@@ -0,0 +1,58 @@
+# mystia_rhythm/tests/test_judgment_system.py
+"""
+JudgmentSystem 判定状态测试
+"""
+import unittest
+
+from core.judgment_system import JudgmentSystem, Judgment
+
+
+class JudgedMaskTest(unittest.TestCase):
+    """judged_mask 与 judgment_results 按音符索引对齐"""
+    
+    def setUp(self):
+        self.judgment = JudgmentSystem()
+        self.judgment.reset(4)
+        
+    def _judge(self, index: int, offset_s: float = 0.0):
+        result = self.judgment.judge_note(None, offset_s, 0.0)
+        self.judgment.mark_judged(index, result)
+        return result
+        
+    def test_reset_sizes_state_to_note_count(self):
+        self.assertEqual(self.judgment.judged_mask.tolist(), [False] * 4)
+        self.assertEqual(self.judgment.judgment_results, [None] * 4)
+        self.assertEqual(self.judgment.remaining_notes, 4)
+        
+    def test_mark_judged_updates_mask_and_results(self):
+        result = self._judge(2, 0.03)
+        self.assertEqual(result.judgment, Judgment.COOL)
+        self.assertEqual(self.judgment.judged_mask.tolist(), [False, False, True, False])
+        self.assertIs(self.judgment.judgment_results[2], result)
+        self.assertEqual(self.judgment.remaining_notes, 3)
+
+        
+    def test_insert_note_shifts_state(self):
+        result = self._judge(1)
+        self.judgment.insert_note(0)
+        self.assertEqual(self.judgment.judged_mask.tolist(), [False, False, True, False, False])
+        self.assertIs(self.judgment.judgment_results[2], result)
+        self.assertEqual(self.judgment.remaining_notes, 4)
+        
+        # 带判定结果插入（音符移动位置）不改变未判定数
+        self.judgment.insert_note(5, result)
+        self.assertTrue(self.judgment.judged_mask[5])
+        self.assertEqual(self.judgment.remaining_notes, 4)
+        
+    def test_remove_note_returns_result(self):
+        result = self._judge(1)
+        self.assertIs(self.judgment.remove_note(1), result)
+        self.assertEqual(self.judgment.remaining_notes, 3)
+        self.assertIsNone(self.judgment.remove_note(0))
+        self.assertEqual(self.judgment.remaining_notes, 2)
+        self.assertEqual(self.judgment.judged_mask.tolist(), [False, False])
+        self.assertEqual(len(self.judgment.judgment_results), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
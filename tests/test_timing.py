@@ -0,0 +1,49 @@
+# mystia_rhythm/tests/test_timing.py
+"""
+TimingSystem 批量换算与单次换算一致性测试
+"""
+import unittest
+
+import numpy as np
+
+from core import timing
+from core.timing import TimingSystem
+
+
+class BeatToTimeBatchTest(unittest.TestCase):
+    """beat_to_time_batch 与 beat_to_time 必须给出相同结果"""
+    
+    def setUp(self):
+        # 元数据BPM与第0拍的BPM变化点不同（真实谱面都会在第0拍给出BPM）
+        self.timing = TimingSystem(bpm=200.0)
+        self.timing.add_bpm_change(0.0, 120.0)
+        self.timing.add_bpm_change(8.0, 180.0)
+        self.timing.add_bpm_change(16.5, 90.0)
+        self.beats = np.array([-2.0, -0.507, 0.0, 0.25, 7.999, 8.0, 12.75, 16.5, 40.0])
+        
+    def _scalar(self):
+        return np.array([self.timing.beat_to_time(float(b)) for b in self.beats])
+        
+    def test_batch_matches_scalar(self):
+        np.testing.assert_allclose(self.timing.beat_to_time_batch(self.beats), self._scalar())
+        
+    def test_negative_beat_uses_beat_zero_bpm(self):
+        self.assertAlmostEqual(self.timing.beat_to_time(-0.507), -0.507 * 0.5)
+        self.assertAlmostEqual(self.timing.beat_to_time_batch(np.array([-0.507]))[0], -0.507 * 0.5)
+        
+    def test_numpy_fallback_matches_scalar(self):
+        # 无论numba是否可用，都检查searchsorted回退路径
+        available = timing.NUMBA_AVAILABLE
+        timing.NUMBA_AVAILABLE = False
+        try:
+            result = self.timing.beat_to_time_batch(self.beats)
+        finally:
+            timing.NUMBA_AVAILABLE = available
+        np.testing.assert_allclose(result, self._scalar())
+        
+    def test_nan_stays_nan(self):
+        self.assertTrue(np.isnan(self.timing.beat_to_time_batch(np.array([np.nan]))[0]))
+
+
+if __name__ == '__main__':
+    unittest.main()
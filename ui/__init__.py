@@ -1,20 +1,27 @@
 # mystia_rhythm/ui/__init__.py
 """
 UI模块
+各屏幕模块在首次访问对应名称时才导入，导入单个屏幕模块不会连带加载其他屏幕
 """
+import importlib
 
-from .menu import MenuScreen
-from .song_select import SongSelectScreen
-from .play_ui import PlayUI
-from .pause_screen import PauseScreen
-from .result_ui import ResultScreen
-from .settings_screen import SettingsScreen
+# 导出名称 -> 所在子模块
+_EXPORTS = {
+    'MenuScreen': '.menu',
+    'SongSelectScreen': '.song_select',
+    'PlayUI': '.play_ui',
+    'PauseScreen': '.pause_screen',
+    'ResultScreen': '.result_ui',
+    'SettingsScreen': '.settings_screen',
+}
 
-__all__ = [
-    'MenuScreen',
-    'SongSelectScreen', 
-    'PlayUI',
-    'PauseScreen',
-    'ResultScreen',
-    'SettingsScreen'
-]
\ No newline at end of file
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
@@ -26,9 +26,10 @@ logger = logging.getLogger(__name__)
 class NoteWidget(Widget):
     """音符Widget"""
     
-    def __init__(self, note: Note, lane_width: float, **kwargs):
+    def __init__(self, note: Note, lane_width: float, note_index: int = -1, **kwargs):
         super().__init__(**kwargs)
         self.note = note
+        self.note_index = note_index  # 音符在谱面中的索引（用于查询判定状态）
         self.lane_width = lane_width
         self.is_hold = note.endbeat is not None
         self.hold_length = 0.0  # 长按长度（像素）
@@ -168,6 +169,7 @@ class PlayUI(BaseScreen):
         # 音符Widgets
         self.note_widgets: List[NoteWidget] = []
         self.active_notes: Dict[int, NoteWidget] = {}  # 活跃音符
+        self._note_revision = game_engine.note_revision  # note_widgets的索引对应的音符列表版本
         
         # UI组件
         self.judgment_line: Optional[JudgmentLine] = None
@@ -181,10 +183,7 @@ class PlayUI(BaseScreen):
         self.background_image: Optional[Image] = None
         
         # 注册回调
-        game_engine.register_callback('on_note_hit', self.on_note_hit)
-        game_engine.register_callback('on_note_miss', self.on_note_miss)
-        game_engine.register_callback('on_combo_change', self.on_combo_change)
-        game_engine.register_callback('on_score_change', self.on_score_change)
+        game_engine.register_callback('on_judgment', self.on_judgment)
         
         logger.debug(f"游玩界面参数 - 轨道数: {self.lanes}, 轨道宽度: {self.lane_width}")
         # 创建UI
@@ -504,6 +503,10 @@ class PlayUI(BaseScreen):
         chart = self.game_engine.current_chart
         timing = chart.timing_system
         
+        # 音符列表变化后（载入谱面、Mod增删音符），各Widget的索引需要重新对应
+        if self._note_revision != self.game_engine.note_revision:
+            self._reindex_note_widgets(chart.notes)
+            
         # 计算可见时间范围（提前2秒显示）
         visible_start = current_time - 2.0
         visible_end = current_time + 5.0 / self.scroll_speed
@@ -529,11 +532,12 @@ class PlayUI(BaseScreen):
                 # 检查是否已创建widget
                 note_exists = any(w.note == note for w in self.note_widgets)
                 if not note_exists:
-                    widget = NoteWidget(note, self.lane_width)
+                    widget = NoteWidget(note, self.lane_width, i)
                     self.note_widgets.append(widget)
                     self.add_widget(widget)
                     
         # 更新所有音符位置
+        judged_mask = self.game_engine.judgment.judged_mask
         for widget in self.note_widgets:
             note_time = timing.beat_to_time(widget.note.beat)
             
@@ -543,7 +547,7 @@ class PlayUI(BaseScreen):
             
             # 如果是长按，计算长度
             hold_length = 0
-            if widget.note.endbeat:
+            if widget.note.endbeat is not None:
                 end_time = timing.beat_to_time(widget.note.endbeat)
                 hold_length = (end_time - note_time) * 300 * self.scroll_speed
                 
@@ -551,9 +555,21 @@ class PlayUI(BaseScreen):
             widget.update_position(y_pos, hold_length)
             
             # 检查是否被判定
-            if i in self.game_engine.judgment.judged_notes:
+            if judged_mask[widget.note_index]:
                 widget.judged = True
                 
+    def _reindex_note_widgets(self, notes: List[Note]) -> None:
+        """按音符对象重新计算各Widget在谱面中的索引，移除音符已不在谱面中的Widget"""
+        self._note_revision = self.game_engine.note_revision
+        index_of = {id(note): i for i, note in enumerate(notes)}
+        for widget in self.note_widgets[:]:
+            index = index_of.get(id(widget.note))
+            if index is None:
+                self.note_widgets.remove(widget)
+                self.remove_widget(widget)
+            else:
+                widget.note_index = index
+                
     def _redraw(self) -> None:
         """重绘所有元素"""
         # 绘制判定线
@@ -573,6 +589,14 @@ class PlayUI(BaseScreen):
         secs = int(seconds % 60)
         return f'{mins:02d}:{secs:02d}'
         
+    def on_judgment(self, result, combo: int, score: int) -> None:
+        """判定回调（命中和错过共用）"""
+        if result.judgment == Judgment.MISS:
+            self.on_note_miss(result)
+        else:
+            self.on_note_hit(result)
+        self.on_combo_change(combo)
+        
     def on_note_hit(self, result) -> None:
         """音符命中回调"""
         # 显示判定效果
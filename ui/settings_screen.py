@@ -306,6 +306,9 @@ class SettingsScreen(BaseScreen):
                     self.game_engine.scroll_speed = self.speed_slider.value
                     logger.debug(f"游戏引擎流速更新为: {self.speed_slider.value}")
                 
+                # 更新键位布局
+                self.game_engine.set_key_layout(selected_layout)
+                
                 # 更新音频音量
                 if hasattr(self.game_engine.audio, 'set_volume') and self.volume_slider:
                     self.game_engine.audio.set_volume(
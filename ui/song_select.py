@@ -304,44 +304,29 @@ class SongSelectScreen(BaseScreen):
             logger.warning(f"谱面目录不存在: {BEATMAP_DIR}")
             return
 
-        # 递归查找所有可能的谱面文件
-        chart_files = []
-        
-        # 查找所有.mc和.mc.json文件
-        for ext in ['.mc', '.mc.json']:
-            for chart_file in BEATMAP_DIR.rglob(f'*{ext}'):
-                chart_files.append(chart_file)
+        # 递归查找所有谱面文件，并行读取元数据
+        chart_metas = ChartParser.load_directory(BEATMAP_DIR, ('*.mc', '*.mc.json'))
                 
-        logger.debug(f"找到 {len(chart_files)} 个谱面文件")
+        logger.debug(f"找到 {len(chart_metas)} 个谱面文件")
         
         # 按歌曲目录分组
         songs_by_dir = {}
-        for chart_file in chart_files:
+        for chart_file, metadata in chart_metas:
             song_dir = chart_file.parent
             if song_dir not in songs_by_dir:
                 songs_by_dir[song_dir] = []
-            songs_by_dir[song_dir].append(chart_file)
+            songs_by_dir[song_dir].append((chart_file, metadata))
             
         # 处理每个歌曲目录
-        for song_dir, chart_files in songs_by_dir.items():
-            logger.debug(f"处理歌曲目录: {song_dir} (包含 {len(chart_files)} 个谱面)")
+        for song_dir, chart_metas in songs_by_dir.items():
+            logger.debug(f"处理歌曲目录: {song_dir} (包含 {len(chart_metas)} 个谱面)")
             
-            # 尝试加载第一个谱面获取歌曲信息
-            chart = None
-            for chart_file in chart_files:
-                chart = ChartParser.load_from_file(chart_file)
-                if chart:
-                    break
-                    
-            if not chart:
-                logger.warning(f"无法加载任何谱面，跳过目录: {song_dir}")
-                continue
-                
-            # 创建歌曲信息
+            # 使用第一个谱面的信息创建歌曲信息
+            first_meta = chart_metas[0][1]
             song_info = SongInfo(
                 song_id=song_dir.name,
-                title=chart.metadata.title or song_dir.name,
-                artist=chart.metadata.artist or "Unknown"
+                title=first_meta.title or song_dir.name,
+                artist=first_meta.artist or "Unknown"
             )
 
             # 查找封面
@@ -360,17 +345,15 @@ class SongSelectScreen(BaseScreen):
                 song_info.cover_path = cover_files[0]
                 
             # 添加所有谱面
-            for chart_file in chart_files:
-                chart = ChartParser.load_from_file(chart_file)
-                if chart:
-                    song_info.add_chart(
-                        chart_file, 
-                        chart.metadata.difficulty or "Unknown",
-                        chart.metadata.level,
-                        chart.metadata.charter or "Unknown",
-                        chart.metadata.mode,
-                        chart.metadata.column
-                    )
+            for chart_file, metadata in chart_metas:
+                song_info.add_chart(
+                    chart_file, 
+                    metadata.difficulty or "Unknown",
+                    metadata.level,
+                    metadata.charter or "Unknown",
+                    metadata.mode,
+                    metadata.column
+                )
 
             song_info.sort_charts()
             self.songs.append(song_info)
@@ -0,0 +1,36 @@
+# mystia_rhythm/utils/json_utils.py
+"""
+JSON读写工具
+优先使用orjson（更快，直接处理bytes），不可用时回退到标准库json
+"""
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+# 解析失败时抛出的异常类型（orjson.JSONDecodeError 是 json.JSONDecodeError 的子类）
+JSONDecodeError = json.JSONDecodeError
+
+
+def json_loads(data: Union[bytes, bytearray, str]) -> Any:
+    """解析JSON（接受bytes或str）"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps(obj: Any, indent: bool = True) -> bytes:
+    """序列化为UTF-8编码的JSON bytes"""
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+    return json.dumps(
+        obj, indent=2 if indent else None, ensure_ascii=False
+    ).encode('utf-8')